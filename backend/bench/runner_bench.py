@@ -0,0 +1,200 @@
+import os
+
+# The benchmark always runs against the local job store and never calls a paid LLM endpoint: with no key
+# and the default endpoint the LLM client is disabled, and a zero window keeps summaries off the timings.
+os.environ["LOCAL_AWS"] = "true"
+os.environ["OPEN_API_KEY"] = ""
+os.environ.pop("LLM_ENDPOINT", None)
+os.environ["SUMMARY_BATCH_WINDOW"] = "0"
+
+from backend.bench.synthetic_repo import RepoSpec, generate
+from backend.runner.utils import dependency_analyst, implementer, job_io, planner, reviewer
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse, json, platform, shutil, subprocess, sys, tempfile, time, tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+STAGES = ["dependency_analyst", "planner", "implementer", "reviewer"]
+
+# --- Public API ---
+def run_benchmark(spec: RepoSpec, iterations: int = 5, warmup: int = 1, workdir: Optional[Path] = None) -> Dict[str, Any]:
+    owned = workdir is None
+    root = Path(tempfile.mkdtemp(prefix="runner-bench-")) if owned else workdir
+    root.mkdir(parents=True, exist_ok=True)
+    cwd = os.getcwd()
+    try:
+        repo_url = generate(root / "repo", spec)
+        # LOCAL_S3_ROOT is relative, so artifacts land under the benchmark workdir.
+        os.chdir(root)
+
+        samples: Dict[str, List[float]] = {s: [] for s in STAGES}
+        for i in range(warmup + iterations):
+            timings = _run_pipeline(f"bench-{i}", repo_url)
+            if i >= warmup:
+                for stage, seconds in timings.items():
+                    samples[stage].append(seconds)
+
+        heap = _measure_heap("bench-heap", repo_url)
+
+        return {
+            "meta": _meta(spec, iterations, warmup),
+            "stages": {s: {**_summarise(samples[s]), "peak_heap_mb": heap[s]} for s in STAGES},
+            "peak_rss_mb": _peak_rss_mb(),
+        }
+    finally:
+        os.chdir(cwd)
+        if owned:
+            shutil.rmtree(root, ignore_errors=True)
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.1) -> List[Dict[str, Any]]:
+    rows = []
+    for stage in STAGES:
+        cur = (current.get("stages") or {}).get(stage)
+        base = (baseline.get("stages") or {}).get(stage)
+        if not cur or not base or not base.get("p50_s"):
+            continue
+        ratio = cur["p50_s"] / base["p50_s"]
+        rows.append({
+            "stage": stage,
+            "baseline_p50_s": base["p50_s"],
+            "current_p50_s": cur["p50_s"],
+            "ratio": round(ratio, 3),
+            "regression": ratio > 1 + threshold,
+        })
+    return rows
+
+# --- Internal helpers ---
+def _run_pipeline(job_id: str, repo_url: str) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for stage, artifact, fn in _stage_calls(job_id, repo_url):
+        start = time.perf_counter()
+        payload = fn()
+        out[stage] = time.perf_counter() - start
+        job_io.update(job_id, artifact, payload)
+    return out
+
+def _measure_heap(job_id: str, repo_url: str) -> Dict[str, float]:
+    peaks: Dict[str, float] = {}
+    tracemalloc.start()
+    try:
+        for stage, artifact, fn in _stage_calls(job_id, repo_url):
+            tracemalloc.reset_peak()
+            payload = fn()
+            peaks[stage] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 3)
+            job_io.update(job_id, artifact, payload)
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+def _stage_calls(job_id: str, repo_url: str) -> List[Tuple[str, str, Callable[[], Dict[str, Any]]]]:
+    return [
+        ("dependency_analyst", "dependency", lambda: dependency_analyst.analyse_repo(repo_url, "main")),
+        ("planner", "plan", lambda: planner.plan_single_file(job_id)),
+        ("implementer", "implement.diff", lambda: implementer.implement_diff(job_id, repo_url, "main")),
+        ("reviewer", "review", lambda: reviewer.review_diff(job_id, repo_url, "main")),
+    ]
+
+def _summarise(values: List[float]) -> Dict[str, Any]:
+    if not values:
+        return {"runs": 0}
+    total = sum(values)
+    return {
+        "runs": len(values),
+        "mean_s": round(total / len(values), 6),
+        "min_s": round(min(values), 6),
+        "p50_s": round(_percentile(values, 50), 6),
+        "p90_s": round(_percentile(values, 90), 6),
+        "p99_s": round(_percentile(values, 99), 6),
+        "max_s": round(max(values), 6),
+        "throughput_per_s": round(len(values) / total, 3) if total else None,
+    }
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * pct / 100
+    lo = int(rank)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (rank - lo)
+
+def _peak_rss_mb() -> Dict[str, float]:
+    if resource is None:
+        return {}
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1),
+    }
+
+def _meta(spec: RepoSpec, iterations: int, warmup: int) -> Dict[str, Any]:
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_head(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ruff": shutil.which("ruff") is not None,
+        "iterations": iterations,
+        "warmup": warmup,
+        "spec": spec.to_dict(),
+    }
+
+def _git_head() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=Path(__file__).resolve().parent, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except Exception:
+        return ""
+
+# --- CLI ---
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Benchmark the four runner stages against a synthetic repository.")
+    p.add_argument("--modules", type=int, default=RepoSpec.modules)
+    p.add_argument("--fan-out", type=int, default=RepoSpec.fan_out)
+    p.add_argument("--cycle-density", type=float, default=RepoSpec.cycle_density)
+    p.add_argument("--unused-rate", type=float, default=RepoSpec.unused_rate)
+    p.add_argument("--file-lines", type=int, default=RepoSpec.file_lines)
+    p.add_argument("--packages", type=int, default=RepoSpec.packages)
+    p.add_argument("--seed", type=int, default=RepoSpec.seed)
+    p.add_argument("--iterations", type=int, default=5)
+    p.add_argument("--warmup", type=int, default=1)
+    p.add_argument("--workdir", type=Path, default=None, help="Keep the synthetic repo and job artifacts here.")
+    p.add_argument("--output", type=Path, default=None, help="Write the JSON report to this path (default: stdout).")
+    p.add_argument("--compare", type=Path, default=None, help="Baseline report to compare p50 latencies against.")
+    p.add_argument("--threshold", type=float, default=0.1, help="Allowed p50 slowdown before a stage counts as a regression.")
+    args = p.parse_args(argv)
+
+    spec = RepoSpec(
+        modules=args.modules,
+        fan_out=args.fan_out,
+        cycle_density=args.cycle_density,
+        unused_rate=args.unused_rate,
+        file_lines=args.file_lines,
+        packages=args.packages,
+        seed=args.seed,
+    )
+    report = run_benchmark(spec, iterations=args.iterations, warmup=args.warmup, workdir=args.workdir)
+
+    exit_code = 0
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        rows = compare(report, baseline, args.threshold)
+        report["comparison"] = {"baseline_commit": (baseline.get("meta") or {}).get("commit", ""), "threshold": args.threshold, "stages": rows}
+        if any(r["regression"] for r in rows):
+            exit_code = 1
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+    else:
+        print(text)
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
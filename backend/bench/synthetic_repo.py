@@ -0,0 +1,88 @@
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, List
+import random, subprocess
+
+STDLIB_MODULES = ["os", "sys", "json", "re", "math", "time", "random", "itertools", "functools", "collections"]
+
+@dataclass
+class RepoSpec:
+    modules: int = 50
+    fan_out: int = 3
+    cycle_density: float = 0.05
+    unused_rate: float = 0.2
+    file_lines: int = 60
+    packages: int = 1
+    seed: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+# --- Public API ---
+def generate(dest: Path, spec: RepoSpec, branch: str = "main") -> str:
+    rng = random.Random(spec.seed)
+    dest.mkdir(parents=True, exist_ok=True)
+
+    names = [_module_name(spec, i) for i in range(spec.modules)]
+    for pkg in sorted({n.rsplit(".", 1)[0] for n in names}):
+        pkg_dir = dest / pkg.replace(".", "/")
+        pkg_dir.mkdir(parents=True, exist_ok=True)
+        (pkg_dir / "__init__.py").write_text("", encoding="utf-8")
+
+    for i, name in enumerate(names):
+        src = _module_source(rng, spec, names, i)
+        (dest / (name.replace(".", "/") + ".py")).write_text(src, encoding="utf-8")
+
+    _git(dest, "init", "-q", "-b", branch)
+    _git(dest, "add", "-A")
+    _git(dest, "-c", "user.name=bench", "-c", "user.email=bench@localhost", "commit", "-q", "-m", "synthetic repo")
+    return dest.resolve().as_uri()
+
+# --- Internal helpers ---
+def _module_name(spec: RepoSpec, i: int) -> str:
+    return f"pkg{i % max(1, spec.packages)}.m{i}"
+
+def _module_source(rng: random.Random, spec: RepoSpec, names: List[str], i: int) -> str:
+    n = len(names)
+    targets = set()
+    for _ in range(min(spec.fan_out, n - 1)):
+        # Forward edges keep the graph acyclic; a back edge closes a cycle.
+        if i > 0 and rng.random() < spec.cycle_density:
+            j = rng.randrange(0, i)
+        elif i < n - 1:
+            j = rng.randrange(i + 1, n)
+        else:
+            continue
+        targets.add(j)
+
+    lines: List[str] = []
+    used_calls: List[str] = []
+    for j in sorted(targets):
+        mod, func = names[j], f"f_{j}"
+        lines.append(f"from {mod} import {func}")
+        if rng.random() >= spec.unused_rate:
+            used_calls.append(func)
+
+    for lib in rng.sample(STDLIB_MODULES, k=min(2, len(STDLIB_MODULES))):
+        lines.append(f"import {lib}")
+        if rng.random() >= spec.unused_rate:
+            used_calls.append(f"{lib}.__name__")
+
+    lines.append("")
+    lines.append(f"def f_{i}(x):")
+    lines.append("    total = x")
+    for call in used_calls:
+        lines.append(f"    total = total + len(str({call}))")
+    lines.append("    return total")
+
+    k = 0
+    while len(lines) < spec.file_lines:
+        lines.append("")
+        lines.append(f"def _pad_{i}_{k}(a, b=1):")
+        lines.append(f"    value = a * b + {k}")
+        lines.append("    return value")
+        k += 1
+    return "\n".join(lines) + "\n"
+
+def _git(cwd: Path, *args: str) -> None:
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
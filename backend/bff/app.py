@@ -1,8 +1,10 @@
+from collections import deque
 from datetime import datetime, timezone
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from mangum import Mangum
 from pydantic import BaseModel, AnyUrl
+from typing import Any, Dict, List, Optional
 import boto3, os, json, uuid, logging, sys, threading, traceback
 
 # --- Load .env ---
@@ -13,6 +15,7 @@ except Exception:
     pass
 
 from backend.config import AGENTS_ARN, AWS_REGION, BUCKET_NAME, LOCAL_AWS, LOCAL_S3_ROOT
+from backend.runner.utils import artifact_codec, graph_shard
 
 # --- Logging ---
 log = logging.getLogger()
@@ -34,7 +37,25 @@ def _local_s3_put(key: str, obj: dict):
 
 def _local_s3_get(key: str) -> dict:
     p = LOCAL_S3_ROOT / key
-    return json.loads(p.read_text(encoding="utf-8"))
+    return _decode(p.read_bytes())
+
+# Runner artifacts may be compressed or msgpack-encoded; decode them the way the runner wrote them.
+def _decode(raw: bytes) -> dict:
+    return artifact_codec.decode(raw)
+
+def _store_get(key: str) -> Optional[dict]:
+    try:
+        if LOCAL_AWS:
+            return _local_s3_get(key)
+        obj = s3.get_object(Bucket=BUCKET_NAME, Key=key)
+        return _decode(obj["Body"].read())
+    except (s3.exceptions.NoSuchKey, FileNotFoundError):
+        return None
+
+# Coalesced jobs never run themselves; their artifacts live under the leader job.
+def _artifact_job_id(job_id: str) -> str:
+    job = _store_get(f"jobs/{job_id}/job.json") or {}
+    return job.get("leader_job_id") or job_id
 
 # --- FastAPI App ---
 app = FastAPI(title="Dev Agents BFF")
@@ -48,12 +69,20 @@ if LOCAL_AWS:
         allow_credentials=True,
     )
 
+MAX_REFS = 10
+
 class JobCreate(BaseModel):
     repo_url: AnyUrl
     branch: str = "main"
+    refs: Optional[List[str]] = None
+    profile: bool = False
 
 @app.post("/jobs", status_code=202)
 def create_job(payload: JobCreate):
+    refs = [r.strip() for r in (payload.refs or []) if r.strip()]
+    if len(refs) > MAX_REFS:
+        raise HTTPException(status_code=422, detail={"error": {"message": f"At most {MAX_REFS} refs are allowed"}})
+
     job_id = str(uuid.uuid4())
     now = datetime.now(timezone.utc).isoformat()
     job = {
@@ -61,9 +90,14 @@ def create_job(payload: JobCreate):
         "created_at": now,
         "repo_url": str(payload.repo_url),
         "branch": payload.branch,
+        "profile": payload.profile,
         "status": "accepted",
         "stage": "dependency_analyst",
     }
+    if refs:
+        # Multi-ref analysis: the first ref is the base, the others are diffed against it. Refs may be
+        # branches, tags, full ref names or full commit ids.
+        job.update({"branch": refs[0], "refs": list(dict.fromkeys(refs)), "stage": "multi_ref_analyst"})
     key = f"jobs/{job_id}/job.json"
 
     # --- Step 1: Create job ---
@@ -114,7 +148,11 @@ def get_job(job_id: str):
             data = _local_s3_get(key)
         else:
             obj = s3.get_object(Bucket=BUCKET_NAME, Key=key)
-            data = json.loads(obj["Body"].read().decode("utf-8"))
+            data = _decode(obj["Body"].read())
+        leader_id = data.get("leader_job_id")
+        if leader_id:
+            leader = _store_get(f"jobs/{leader_id}/job.json") or {}
+            data.update({k: leader[k] for k in ("status", "stage") if k in leader})
         return data
     except s3.exceptions.NoSuchKey:
         raise HTTPException(status_code=404, detail={"error": {"message": "Job not found (s3)"}})
@@ -125,6 +163,60 @@ def get_job(job_id: str):
         log.error({"event": "read_job_failed", "job_id": job_id, "error": err_msg, "traceback": traceback.format_exc(),})
         raise HTTPException(status_code=500, detail={"error": err_msg})
 
+@app.get("/jobs/{job_id}/graph/dependents")
+def get_dependents(job_id: str, module: str, transitive: bool = False, limit: int = Query(1000, ge=1, le=100000)):
+    try:
+        job_id = _artifact_job_id(job_id)
+        manifest = _store_get(f"jobs/{job_id}/graph/manifest.json")
+        if not manifest:
+            raise HTTPException(status_code=404, detail={"error": {"message": "Dependency graph index not found"}})
+        shards = int(manifest.get("shards") or 1)
+        cache: Dict[int, Dict[str, Any]] = {}
+
+        def lookup(mod: str) -> Optional[Dict[str, Any]]:
+            i = graph_shard.shard_of(mod, shards)
+            if i not in cache:
+                cache[i] = _store_get(f"jobs/{job_id}/graph/dependents/{i}.json") or {}
+            return cache[i].get(mod)
+
+        entry = lookup(module)
+        if entry is None:
+            raise HTTPException(status_code=404, detail={"error": {"message": f"Module '{module}' not found in graph"}})
+
+        result = {"module": module, "impact": entry.get("impact", 0), "dependents": entry.get("dependents", [])}
+        if transitive:
+            seen = {module}
+            order = []
+            frontier = deque(entry.get("dependents", []))
+            while frontier and len(order) < limit:
+                mod = frontier.popleft()
+                if mod in seen:
+                    continue
+                seen.add(mod)
+                order.append(mod)
+                frontier.extend((lookup(mod) or {}).get("dependents", []))
+            result["transitive"] = order
+            result["truncated"] = len(order) < entry.get("impact", 0)
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        err_msg = str(e)
+        log.error({"event": "read_graph_failed", "job_id": job_id, "module": module, "error": err_msg, "traceback": traceback.format_exc(),})
+        raise HTTPException(status_code=500, detail={"error": err_msg})
+
+@app.get("/jobs/{job_id}/graph/impact")
+def get_impact(job_id: str, top: int = Query(20, ge=1, le=100)):
+    try:
+        manifest = _store_get(f"jobs/{_artifact_job_id(job_id)}/graph/manifest.json")
+    except Exception as e:
+        err_msg = str(e)
+        log.error({"event": "read_graph_failed", "job_id": job_id, "error": err_msg, "traceback": traceback.format_exc(),})
+        raise HTTPException(status_code=500, detail={"error": err_msg})
+    if not manifest:
+        raise HTTPException(status_code=404, detail={"error": {"message": "Dependency graph index not found"}})
+    return {"nodes": manifest.get("nodes", 0), "edges": manifest.get("edges", 0), "top_impact": (manifest.get("top_impact") or [])[:top]}
+
 # --- Lambda entrypoint ---
 STAGE = os.getenv("STAGE", "")
 BASE_PATH = f"/{STAGE}" if STAGE else None
@@ -5,4 +5,42 @@ AGENTS_ARN = os.getenv("AGENTS_ARN", "")
 AWS_REGION = os.getenv("AWS_REGION", "ap-southeast-2")
 BUCKET_NAME = os.getenv("BUCKET_NAME", "dev-agents-bff")
 LOCAL_AWS = os.getenv("LOCAL_AWS", "").lower() in ("1", "true", "yes", "stub")
-LOCAL_S3_ROOT = Path("_local_s3")
\ No newline at end of file
+LOCAL_S3_ROOT = Path("_local_s3")
+
+# --- LLM client ---
+LLM_ENDPOINT = os.getenv("LLM_ENDPOINT", "https://api.openai.com/v1/chat/completions")
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "15"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_CACHE_PREFIX = "jobs/_cache/llm"
+
+# --- Summary batching ---
+# In-process window: only local mode runs several jobs in one process. A Lambda invocation handles one job,
+# so it relies on the shared queue below instead.
+SUMMARY_BATCH_WINDOW = float(os.getenv("SUMMARY_BATCH_WINDOW", "0.5" if LOCAL_AWS else "0"))
+SUMMARY_BATCH_MAX = int(os.getenv("SUMMARY_BATCH_MAX", "20"))
+# Deployed runners batch across invocations through a pending queue in the job store: the first review to
+# arrive waits SUMMARY_SHARED_WINDOW for others, then submits them all in one request.
+SUMMARY_SHARED = os.getenv("SUMMARY_SHARED", "0" if LOCAL_AWS else "1").lower() in ("1", "true", "yes")
+SUMMARY_SHARED_WINDOW = float(os.getenv("SUMMARY_SHARED_WINDOW", "10"))
+SUMMARY_SHARED_KEY = "jobs/_summaries/pending.json"
+
+# --- Admission control ---
+ADMISSION_MAX_RUNNING = int(os.getenv("ADMISSION_MAX_RUNNING", "20"))
+ADMISSION_MAX_PER_REPO = int(os.getenv("ADMISSION_MAX_PER_REPO", "2"))
+ADMISSION_STALE_SECONDS = int(os.getenv("ADMISSION_STALE_SECONDS", "3600"))
+ADMISSION_STATE_KEY = "jobs/_admission/state.json"
+
+# --- Dependency graph index ---
+GRAPH_INDEX_NODES_PER_SHARD = 500
+GRAPH_INDEX_MAX_SHARDS = 256
+
+# --- Artifact encoding ---
+# Codec per artifact name (fnmatch patterns, first match wins): "json", "json+gzip", "json+zstd" or "msgpack".
+ARTIFACT_CODEC_DEFAULT = os.getenv("ARTIFACT_CODEC_DEFAULT", "json")
+ARTIFACT_CODECS = {
+    "dependency": os.getenv("ARTIFACT_CODEC_DEPENDENCY", "json+gzip"),
+    "graph/dependents/*": os.getenv("ARTIFACT_CODEC_GRAPH", "json+gzip"),
+    "multi_dependency": os.getenv("ARTIFACT_CODEC_DEPENDENCY", "json+gzip"),
+}
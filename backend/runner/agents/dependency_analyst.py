@@ -1,5 +1,5 @@
 import logging, sys, traceback
-from backend.runner.utils import dependency_analyst, job_io
+from backend.runner.utils import dependency_analyst, dependency_graph, job_io
 
 log = logging.getLogger()
 if not log.handlers:
@@ -12,6 +12,7 @@ def run(job_id: str, repo_url: str, branch: str):
     try:
         payload = dependency_analyst.analyse_repo(repo_url, branch)
         job_io.update(job_id, "dependency", payload)
+        dependency_graph.write_index(job_id, payload)
         job_io.update(job_id, "job", {"stage": "planner",})
     except Exception as e:
         err_msg = str(e)
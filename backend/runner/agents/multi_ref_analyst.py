@@ -0,0 +1,21 @@
+import logging, sys, traceback
+from backend.runner.utils import dependency_analyst, job_io
+
+log = logging.getLogger()
+if not log.handlers:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(handler)
+log.setLevel(logging.INFO)
+
+def run(job_id: str, repo_url: str, branch: str):
+    try:
+        job = job_io.load(job_id, "job") or {}
+        refs = list(job.get("refs") or [branch])
+        payload = dependency_analyst.analyse_refs(repo_url, refs)
+        job_io.update(job_id, "multi_dependency", payload)
+        job_io.update(job_id, "job", {"status": "completed",})
+    except Exception as e:
+        err_msg = str(e)
+        job_io.update(job_id, "job", { "status": "failed",})
+        log.error({"event": "agent_stage_failed", "job_id": job_id, "stage": "multi_ref_analyst", "error": err_msg, "traceback": traceback.format_exc(),})
\ No newline at end of file
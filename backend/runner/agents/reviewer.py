@@ -11,7 +11,10 @@ log.setLevel(logging.INFO)
 def run(job_id: str, repo_url: str, branch: str):
     try:
         payload = reviewer.review_diff(job_id, repo_url, branch)
+        sample = payload.pop("summary_sample", None)
         job_io.update(job_id, "review", payload)
+        if sample is not None:
+            reviewer.defer_summary(job_id, sample)
         job_io.update(job_id, "job", {"status": "completed",})
     except Exception as e:
         err_msg = str(e)
@@ -1,5 +1,5 @@
-from backend.runner.agents import dependency_analyst, planner, implementer, reviewer
-from backend.runner.utils import job_io
+from backend.runner.agents import dependency_analyst, multi_ref_analyst, planner, implementer, reviewer
+from backend.runner.utils import admission, job_io, metrics
 from backend.config import LOCAL_AWS, AWS_REGION, AGENTS_ARN
 from typing import Any, Dict
 import boto3, json, logging, sys, threading, zipimport
@@ -13,7 +13,7 @@ if not log.handlers:
 log.setLevel(logging.INFO)
 
 # --- Allowed stages & statuses ---
-ALLOWED_STAGES = {"dependency_analyst", "planner", "implementer", "reviewer"}
+ALLOWED_STAGES = {"dependency_analyst", "multi_ref_analyst", "planner", "implementer", "reviewer"}
 ALLOWED_STATUSES = {"accepted", "running", "completed", "failed"}
 
 # --- Handler ---
@@ -55,49 +55,83 @@ def handler(event: Dict[str, Any], context: Any):
     if status not in {"accepted", "running"}:
         return {"ok": True}
 
-    # --- Step 5: Promote to running if currently accepted ---
+    if job.get("leader_job_id"):
+        return {"ok": True, "leader_job_id": job["leader_job_id"]}
+
+    # --- Steps 5-7 are measured together; only the job load above runs before the stage is known ---
+    with metrics.record_stage(job_id, stage, profile=bool(job.get("profile"))):
+        return _admit_and_dispatch(job_id, job, repo_url, branch, status, stage)
+
+def _admit_and_dispatch(job_id: str, job: Dict[str, Any], repo_url: str, branch: str, status: str, stage: str) -> Dict[str, Any]:
+    # --- Step 5: Admit, then promote to running if currently accepted ---
     if status == "accepted":
-        status = "running"
-        job_io.update(job_id, "job", {"status": status,})
-        
+        with metrics.phase("admission"):
+            try:
+                decision, to_start = admission.admit(job_id, job)
+            except Exception as e:
+                decision, to_start = "run", []
+                log.error({"event": "admission_failed", "job_id": job_id, "error": str(e),})
+            for queued_id in to_start:
+                _self_reinvoke(queued_id)
+            if decision != "run":
+                return {"ok": True, "admission": decision}
+
+            status = "running"
+            job_io.update(job_id, "job", {"status": status,})
+
     # --- Step 6: Dispatch exactly one stage ---
     try:
         log.info({"event": "runner_stage_dispatch", "job_id": job_id, "status": status, "stage": stage,})
 
-        if stage == "dependency_analyst":
-            dependency_analyst.run(job_id, repo_url, branch)
-        elif stage == "planner":
-            planner.run(job_id, repo_url, branch)
-        elif stage == "implementer":
-            implementer.run(job_id, repo_url, branch)
-        elif stage == "reviewer":
-            reviewer.run(job_id, repo_url, branch)
-        else:
-            raise ValueError(f"Unknown stage '{stage}'")
+        with metrics.phase("dispatch"):
+            if stage == "dependency_analyst":
+                dependency_analyst.run(job_id, repo_url, branch)
+            elif stage == "planner":
+                planner.run(job_id, repo_url, branch)
+            elif stage == "implementer":
+                implementer.run(job_id, repo_url, branch)
+            elif stage == "reviewer":
+                reviewer.run(job_id, repo_url, branch)
+            elif stage == "multi_ref_analyst":
+                multi_ref_analyst.run(job_id, repo_url, branch)
+            else:
+                raise ValueError(f"Unknown stage '{stage}'")
 
         log.info({"event": "runner_stage_completed", "job_id": job_id, "status": status, "stage": stage,})
     except Exception as e:
         err_msg = str(e)
-        job_io.update(job_id, "job", {"status": "failed",})
-        log.error({"event": "runner_stage_failed", "job_id": job_id, "stage": stage, "error": err_msg,})
+        with metrics.phase("handoff"):
+            job_io.update(job_id, "job", {"status": "failed",})
+            log.error({"event": "runner_stage_failed", "job_id": job_id, "stage": stage, "error": err_msg,})
+            _release(job_id)
         return {"ok": False, "error": err_msg}
 
     # --- Step 7: Fire-and-forget self-reinvoke exactly once if the stage advanced ---
-    next_job = job_io.load(job_id, "job") or {}
-    next_status = next_job.get("status")
-    next_stage = next_job.get("stage")
-
-    should_continue = (
-        next_status in {"accepted", "running"}
-        and next_stage in ALLOWED_STAGES
-        and next_stage != stage
-    )
-
-    if should_continue:
-        _self_reinvoke(job_id)
+    with metrics.phase("handoff"):
+        next_job = job_io.load(job_id, "job") or {}
+        next_status = next_job.get("status")
+        next_stage = next_job.get("stage")
+
+        should_continue = (
+            next_status in {"accepted", "running"}
+            and next_stage in ALLOWED_STAGES
+            and next_stage != stage
+        )
+
+        if should_continue:
+            _self_reinvoke(job_id)
+        elif next_status in {"completed", "failed"}:
+            _release(job_id)
 
     return {"ok": True}
 
+def _release(job_id: str) -> None:
+    try:
+        for queued_id in admission.release(job_id):
+            _self_reinvoke(queued_id)
+    except Exception as e:
+        log.error({"event": "admission_release_failed", "job_id": job_id, "error": str(e),})
+
 def _self_reinvoke(job_id: str) -> None:
     if LOCAL_AWS:
         threading.Thread(target=lambda: handler({"job_id": job_id}, None), daemon=True).start()
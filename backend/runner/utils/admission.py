@@ -0,0 +1,189 @@
+from backend.config import ADMISSION_MAX_PER_REPO, ADMISSION_MAX_RUNNING, ADMISSION_STALE_SECONDS, ADMISSION_STATE_KEY
+from backend.runner.utils import git_refs, job_io
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import hashlib, logging, random, threading, time
+
+log = logging.getLogger()
+
+# The state object is updated with conditional writes, so concurrent runners retry instead of losing updates.
+# The lock only saves local-mode threads from racing each other into retries.
+_lock = threading.Lock()
+CAS_ATTEMPTS = 10
+
+# --- Public API ---
+# Returns ("run" | "queued" | "follower", queued job ids that were started and need invoking).
+def admit(job_id: str, job: Dict[str, Any]) -> Tuple[str, List[str]]:
+    repo_url = job.get("repo_url", "")
+    refs = job.get("refs") or [job.get("branch", "main")]
+    commits = [job["commit"]] if job.get("commit") else [resolve_commit(repo_url, ref) for ref in refs]
+    commit = ",".join(commits)
+    repo = _repo_key(repo_url)
+    # An unresolved ref could be at any commit, so such a job is never coalesced with another.
+    # The initial stage distinguishes a single-branch pipeline from a multi-ref analysis of the same refs.
+    dedupe = _dedupe_key(repo_url, ",".join(refs), commit, job.get("stage", "")) if all(commits) else None
+
+    def apply(state: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+        if job_id in state["running"]:
+            return "run", None
+        if any(q["job_id"] == job_id for q in state["queue"]):
+            return "queued", None
+
+        inflight = state["inflight"].get(dedupe) if dedupe else None
+        if inflight and inflight["leader"] != job_id:
+            if job_id not in inflight["followers"]:
+                inflight["followers"].append(job_id)
+            return "follower", inflight["leader"]
+
+        if dedupe:
+            state["inflight"][dedupe] = {"leader": job_id, "followers": []}
+        if _has_capacity(state, repo):
+            state["running"][job_id] = {"repo": repo, "dedupe": dedupe, "since": time.time()}
+            return "run", None
+        state["queue"].append({"job_id": job_id, "repo": repo, "dedupe": dedupe})
+        return "queued", None
+
+    (decision, leader), effects = _transact(apply)
+    if job_id in effects["start"]:
+        effects["start"].remove(job_id)
+        decision = "run"
+    to_start = _apply_effects(effects)
+
+    if decision == "follower":
+        job_io.update(job_id, "job", {"commit": commit, "leader_job_id": leader,})
+        # The state may have moved on between the state write and the job update (the leader released
+        # or was reclaimed), and another runner's patch to this job.json may have been overwritten.
+        _reconcile_follower(job_id, leader)
+        log.info({"event": "admission_coalesced", "job_id": job_id, "leader_job_id": leader, "commit": commit,})
+        return decision, to_start
+
+    job_io.update(job_id, "job", {"commit": commit, "queued": decision == "queued",})
+    log.info({"event": "admission_decision", "job_id": job_id, "decision": decision, "commit": commit, "coalescable": dedupe is not None,})
+    return decision, to_start
+
+# Frees the job's slot, mirrors its outcome onto followers and returns queued job ids to start.
+def release(job_id: str) -> List[str]:
+    def apply(state: Dict[str, Any]) -> List[str]:
+        state["queue"] = [q for q in state["queue"] if q["job_id"] != job_id]
+        entry = state["running"].pop(job_id, None)
+        if entry is None or not entry.get("dedupe"):
+            return []
+        inflight = state["inflight"].get(entry["dedupe"])
+        if not inflight or inflight["leader"] != job_id:
+            return []
+        state["inflight"].pop(entry["dedupe"])
+        return inflight["followers"]
+
+    followers, effects = _transact(apply)
+    _mirror(job_id, followers)
+    to_start = _apply_effects(effects)
+    log.info({"event": "admission_released", "job_id": job_id, "followers": followers, "started": to_start,})
+    return to_start
+
+def resolve_commit(repo_url: str, ref: str) -> str:
+    try:
+        if git_refs.is_commit_id(ref):
+            return ref.lower()
+        return git_refs.resolve(ref, git_refs.list_remote(repo_url, [ref], timeout=30))[1]
+    except Exception:
+        return ""
+
+# --- Internal helpers ---
+# Runs apply() against the latest state and commits it with a conditional write, retrying on conflict.
+# Every write also reclaims stale slots and starts queued jobs that now fit.
+def _transact(apply: Callable[[Dict[str, Any]], Any]) -> Tuple[Any, Dict[str, Any]]:
+    for attempt in range(CAS_ATTEMPTS):
+        with _lock:
+            state, etag = _load_state()
+            effects = {"start": [], "repoint": {}}
+            _reclaim(state, effects)
+            result = apply(state)
+            effects["start"].extend(_drain(state))
+            if job_io.write_if(ADMISSION_STATE_KEY, state, etag):
+                return result, effects
+        time.sleep(random.uniform(0, min(1.0, 0.05 * 2 ** attempt)))
+    raise RuntimeError("admission state is contended; giving up after retries")
+
+def _load_state() -> Tuple[Dict[str, Any], Optional[str]]:
+    state, etag = job_io.read_versioned(ADMISSION_STATE_KEY)
+    state = state or {}
+    state.setdefault("running", {})
+    state.setdefault("inflight", {})
+    state.setdefault("queue", [])
+    return state, etag
+
+# Drops slots held by runs that died without releasing them; their first follower becomes the new leader.
+def _reclaim(state: Dict[str, Any], effects: Dict[str, Any]) -> None:
+    if ADMISSION_STALE_SECONDS <= 0:
+        return
+    cutoff = time.time() - ADMISSION_STALE_SECONDS
+    for job_id, entry in list(state["running"].items()):
+        if entry.get("since", 0) >= cutoff:
+            continue
+        state["running"].pop(job_id)
+        dedupe = entry.get("dedupe")
+        inflight = state["inflight"].pop(dedupe, None) if dedupe else None
+        followers = (inflight or {}).get("followers") or []
+        if followers:
+            leader, rest = followers[0], followers[1:]
+            state["inflight"][dedupe] = {"leader": leader, "followers": rest}
+            state["queue"].insert(0, {"job_id": leader, "repo": entry["repo"], "dedupe": dedupe})
+            effects["repoint"][leader] = None
+            for f in rest:
+                effects["repoint"][f] = leader
+        log.warning({"event": "admission_reclaimed", "job_id": job_id, "followers": followers,})
+
+def _drain(state: Dict[str, Any]) -> List[str]:
+    started: List[str] = []
+    remaining = []
+    for q in state["queue"]:
+        if _has_capacity(state, q["repo"]):
+            state["running"][q["job_id"]] = {"repo": q["repo"], "dedupe": q["dedupe"], "since": time.time()}
+            started.append(q["job_id"])
+        else:
+            remaining.append(q)
+    state["queue"] = remaining
+    return started
+
+def _apply_effects(effects: Dict[str, Any]) -> List[str]:
+    for job_id, leader in effects["repoint"].items():
+        patch = {"leader_job_id": leader,}
+        if leader is None:
+            patch["queued"] = True
+        job_io.update(job_id, "job", patch)
+    for job_id in effects["start"]:
+        job_io.update(job_id, "job", {"queued": False,})
+    return effects["start"]
+
+def _mirror(leader_id: str, followers: List[str]) -> None:
+    if not followers:
+        return
+    leader = job_io.load(leader_id, "job") or {}
+    for follower_id in followers:
+        job_io.update(follower_id, "job", {"status": leader.get("status"), "stage": leader.get("stage"), "leader_job_id": leader_id,})
+
+def _reconcile_follower(job_id: str, leader_id: str) -> None:
+    state, _ = _load_state()
+    if job_id in state["running"] or any(q["job_id"] == job_id for q in state["queue"]):
+        job_io.update(job_id, "job", {"leader_job_id": None,})
+        return
+    for inflight in state["inflight"].values():
+        if job_id in inflight["followers"]:
+            if inflight["leader"] != leader_id:
+                job_io.update(job_id, "job", {"leader_job_id": inflight["leader"],})
+            return
+    _mirror(leader_id, [job_id])
+
+def _has_capacity(state: Dict[str, Any], repo: str) -> bool:
+    running = state["running"]
+    if ADMISSION_MAX_RUNNING > 0 and len(running) >= ADMISSION_MAX_RUNNING:
+        return False
+    if ADMISSION_MAX_PER_REPO > 0 and sum(1 for r in running.values() if r["repo"] == repo) >= ADMISSION_MAX_PER_REPO:
+        return False
+    return True
+
+def _repo_key(repo_url: str) -> str:
+    return repo_url.strip().rstrip("/").removesuffix(".git").lower()
+
+def _dedupe_key(repo_url: str, branch: str, commit: str, stage: str = "") -> str:
+    raw = f"{_repo_key(repo_url)}|{branch}|{commit}|{stage}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
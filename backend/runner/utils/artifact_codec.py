@@ -0,0 +1,69 @@
+from backend.config import ARTIFACT_CODEC_DEFAULT, ARTIFACT_CODECS
+from fnmatch import fnmatchcase
+from typing import Any, Optional, Tuple
+import gzip, json
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+CODECS = {"json", "json+gzip", "json+zstd", "msgpack"}
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# --- Public API ---
+def codec_for_key(key: str) -> str:
+    name = _artifact_name(key)
+    for pattern, codec in ARTIFACT_CODECS.items():
+        if fnmatchcase(name, pattern):
+            return available(codec)
+    return available(ARTIFACT_CODEC_DEFAULT)
+
+def available(codec: str) -> str:
+    # Optional codecs degrade to stdlib gzip when their package is not installed.
+    if codec == "json+zstd" and zstandard is None:
+        return "json+gzip"
+    if codec == "msgpack" and msgpack is None:
+        return "json+gzip"
+    return codec if codec in CODECS else "json"
+
+def encode(data: Any, codec: str, pretty: bool = False) -> Tuple[bytes, str, Optional[str]]:
+    if codec == "msgpack":
+        return msgpack.packb(data, use_bin_type=True), "application/msgpack", None
+
+    if pretty and codec == "json":
+        body = json.dumps(data, indent=2).encode("utf-8")
+    else:
+        body = json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    if codec == "json+gzip":
+        return gzip.compress(body, compresslevel=6, mtime=0), "application/json", "gzip"
+    if codec == "json+zstd":
+        return zstandard.ZstdCompressor(level=3).compress(body), "application/json", "zstd"
+    return body, "application/json", None
+
+def decode(raw: bytes) -> Any:
+    # Sniff the payload rather than trusting metadata, so local files and older plain-JSON objects both decode.
+    if raw[:2] == GZIP_MAGIC:
+        raw = gzip.decompress(raw)
+    elif raw[:4] == ZSTD_MAGIC:
+        if zstandard is None:
+            raise RuntimeError("artifact is zstd-compressed but 'zstandard' is not installed")
+        raw = zstandard.ZstdDecompressor().decompress(raw)
+    elif raw[:1] and (0x80 <= raw[0] <= 0x8F or raw[0] in (0xDE, 0xDF)):
+        if msgpack is None:
+            raise RuntimeError("artifact is msgpack-encoded but 'msgpack' is not installed")
+        return msgpack.unpackb(raw, raw=False)
+    return json.loads(raw.decode("utf-8"))
+
+# --- Internal helpers ---
+def _artifact_name(key: str) -> str:
+    parts = key.split("/", 2)
+    name = parts[2] if len(parts) == 3 and parts[0] == "jobs" else key
+    return name[: -len(".json")] if name.endswith(".json") else name
@@ -1,30 +1,92 @@
+from backend.runner.utils import dependency_graph, git_refs, metrics
 from pathlib import Path
-from typing import Any, Dict, List, Set
-import ast, json, subprocess, shutil, tempfile
+from typing import Any, Dict, List, Optional, Set, Tuple
+import ast, hashlib, json, subprocess, shutil, tempfile
+
+# Files ruff reads its settings from; they are materialised with the sources so per-file ignores still apply.
+RUFF_CONFIG_FILES = {"pyproject.toml", "ruff.toml", ".ruff.toml"}
 
 # --- Public API ---
 def analyse_repo(repo_url: str, branch: str) -> Dict[str, Any]:
     tmpdir = tempfile.mkdtemp(prefix="dep-analyst-")
     repo_root = Path(tmpdir) / "repo"
     try:
-        _shallow_clone(repo_url, branch or "main", repo_root)
+        with metrics.phase("clone"):
+            _shallow_clone(repo_url, branch or "main", repo_root)
+        metrics.count_path_bytes("bytes_cloned", repo_root)
         py_files = _collect_python_files(repo_root)
-        graph, imports_map = _build_dependency_graph(repo_root, py_files)
-        topo_order, residual = _topo_sort_and_cycles(graph)
-        unused_ast = _detect_unused(imports_map)
-        unused_ruff = _try_ruff_f401(repo_root)
-        unused = _merge_unused(unused_ast, unused_ruff)
+        metrics.count("py_files", len(py_files))
+        with metrics.phase("parse"):
+            graph, imports_map = _build_dependency_graph(repo_root, py_files)
+        with metrics.phase("ruff"):
+            unused_ruff = _try_ruff_f401(repo_root)
+        return _build_payload(graph, imports_map, unused_ruff)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+def analyse_refs(repo_url: str, refs: List[str]) -> Dict[str, Any]:
+    if not refs:
+        raise ValueError("at least one ref is required")
+    tmpdir = tempfile.mkdtemp(prefix="dep-analyst-refs-")
+    store = Path(tmpdir) / "store"
+    blob_dir = Path(tmpdir) / "blobs"
+    try:
+        with metrics.phase("fetch"):
+            commits = _fetch_refs(repo_url, refs, store)
+        metrics.count_path_bytes("bytes_cloned", store)
+
+        # Parse results are keyed by blob id and ruff findings by (path, blob id, ruff config), so a file
+        # shared by several refs is handled once unless its location or lint settings differ.
+        parsed: Dict[str, _ImportVisitor] = {}
+        ruff_cache: Dict[Tuple[str, str, str], List[str]] = {}
+        results: Dict[str, Dict[str, Any]] = {}
+        trees: Dict[str, Dict[str, str]] = {}
+        base = refs[0]
+
+        for i, ref in enumerate(refs):
+            with metrics.phase("ls_tree"):
+                blobs = _ls_tree(store, f"refs/analysis/{i}")
+            tree = {path: sha for path, sha in blobs.items() if path.endswith(".py")}
+            configs = {path: sha for path, sha in blobs.items() if path.rsplit("/", 1)[-1] in RUFF_CONFIG_FILES}
+            config_id = hashlib.sha1(json.dumps(sorted(configs.items())).encode("utf-8")).hexdigest()
+            trees[ref] = tree
+            new_blobs = {sha: path for path, sha in tree.items() if sha not in parsed}
+            metrics.count("blobs_parsed", len(new_blobs))
+            metrics.count("blobs_reused", len(tree) - len(new_blobs))
+
+            with metrics.phase("parse"):
+                sources = _cat_blobs(store, list(new_blobs))
+                for sha, path in new_blobs.items():
+                    parsed[sha] = _parse_source(sources[sha], path)
+            with metrics.phase("ruff"):
+                pending = {path: sha for path, sha in tree.items() if (path, sha, config_id) not in ruff_cache}
+                metrics.count("ruff_files_checked", len(pending))
+                if pending and shutil.which("ruff") is not None:
+                    missing = [sha for sha in {*pending.values(), *configs.values()} if sha not in sources]
+                    sources.update(_cat_blobs(store, missing))
+                    findings = _try_ruff_f401_tree(blob_dir / str(i), {**pending, **configs}, sources)
+                else:
+                    findings = {}
+                for path, sha in pending.items():
+                    ruff_cache[(path, sha, config_id)] = findings.get(path, [])
+
+            by_module = {_path_to_module(path): parsed[sha] for path, sha in tree.items()}
+            graph, imports_map = _link_modules(by_module)
+            unused_ruff: Dict[str, List[str]] = {}
+            for path, sha in tree.items():
+                if ruff_cache.get((path, sha, config_id)):
+                    unused_ruff.setdefault(_path_to_module(path), []).extend(ruff_cache[(path, sha, config_id)])
+
+            payload = _build_payload(graph, imports_map, unused_ruff)
+            payload["commit"] = commits[ref]
+            payload["changed_files"] = None if ref == base else _changed_paths(trees[base], tree)
+            results[ref] = payload
 
-        nodes = sorted(graph.keys())
-        edges = sorted([(s, d) for s, dsts in graph.items() for d in dsts])
-        impacted = sorted(unused.keys(), key=lambda m: (-len(unused[m]), m))
         return {
-            "nodes": nodes,
-            "edges": edges,
-            "impacted": impacted,
-            "topo_order": topo_order,
-            "warnings": {"circular_imports": residual} if residual else {},
-            "unused_imports": unused,
+            "base": base,
+            "refs": results,
+            "delta": {ref: _graph_delta(results[base], results[ref]) for ref in refs[1:]},
+            "stats": {"blobs_parsed": len(parsed), "files_total": sum(len(t) for t in trees.values())},
         }
     finally:
         shutil.rmtree(tmpdir, ignore_errors=True)
@@ -70,17 +132,24 @@ def _collect_python_files(root: Path) -> List[Path]:
     return [p for p in root.rglob("*.py") if p.is_file()]
 
 def _build_dependency_graph(repo_root: Path, py_files: List[Path]):
-    modules = {_file_to_module(repo_root, p) for p in py_files}
-    graph: Dict[str, Set[str]] = {m: set() for m in modules}
-    imports_map: Dict[str, Dict[str, Set[str]]] = {}
-
+    parsed: Dict[str, _ImportVisitor] = {}
     for p in py_files:
-        mod = _file_to_module(repo_root, p)
         src = p.read_text(encoding="utf-8", errors="ignore")
-        tree = ast.parse(src, filename=str(p))
-        v = _ImportVisitor()
-        v.visit(tree)
+        parsed[_file_to_module(repo_root, p)] = _parse_source(src, str(p))
+    return _link_modules(parsed)
+
+def _parse_source(src: str, filename: str) -> _ImportVisitor:
+    tree = ast.parse(src, filename=filename)
+    v = _ImportVisitor()
+    v.visit(tree)
+    return v
 
+def _link_modules(parsed: Dict[str, _ImportVisitor]):
+    modules = set(parsed)
+    graph: Dict[str, Set[str]] = {m: set() for m in modules}
+    imports_map: Dict[str, Dict[str, Set[str]]] = {}
+
+    for mod, v in parsed.items():
         imports_map[mod] = {"used": v.used_names, "imports": {}}
         for key, names in v.imports.items():
             clean_names = {n for n in names if n != "*"}
@@ -112,13 +181,107 @@ def _build_dependency_graph(repo_root: Path, py_files: List[Path]):
 
     return graph, imports_map
 
+def _build_payload(graph: Dict[str, Set[str]], imports_map: Dict[str, Dict[str, Set[str]]], unused_ruff: Dict[str, List[str]]) -> Dict[str, Any]:
+    with metrics.phase("graph"):
+        topo_order, residual = _topo_sort_and_cycles(graph)
+        impact = dependency_graph.transitive_impact(graph)
+        unused_ast = _detect_unused(imports_map)
+    unused = _merge_unused(unused_ast, unused_ruff)
+
+    nodes = sorted(graph.keys())
+    edges = sorted([(s, d) for s, dsts in graph.items() for d in dsts])
+    impacted = sorted(unused.keys(), key=lambda m: (-len(unused[m]), m))
+    return {
+        "nodes": nodes,
+        "edges": edges,
+        "impacted": impacted,
+        "topo_order": topo_order,
+        "degree": dependency_graph.degree(edges),
+        "impact": impact,
+        "warnings": {"circular_imports": residual} if residual else {},
+        "unused_imports": unused,
+    }
+
 def _file_to_module(repo_root: Path, py_path: Path) -> str:
-    rel = py_path.relative_to(repo_root).with_suffix("")
-    parts = list(rel.parts)
+    return _path_to_module(py_path.relative_to(repo_root).as_posix())
+
+def _path_to_module(rel_path: str) -> str:
+    parts = rel_path[: -len(".py")].split("/") if rel_path.endswith(".py") else rel_path.split("/")
     if parts and parts[-1] == "__init__":
         parts = parts[:-1]
     return ".".join(parts)
 
+def _fetch_refs(repo_url: str, refs: List[str], dest: Path) -> Dict[str, str]:
+    # One bare object store and one fetch: objects shared between refs are transferred and stored once.
+    # Branches and tags are resolved with one ls-remote; full commit ids are fetched directly.
+    names = [ref for ref in refs if not git_refs.is_commit_id(ref)]
+    remote = git_refs.list_remote(repo_url, names) if names else {}
+    specs = [f"+{git_refs.resolve(ref, remote)[0]}:refs/analysis/{i}" for i, ref in enumerate(refs)]
+    subprocess.check_call(["git", "init", "-q", "--bare", str(dest)])
+    subprocess.check_call(["git", "-C", str(dest), "fetch", "-q", "--depth", "1", "--no-tags", repo_url, *specs])
+    commits: Dict[str, str] = {}
+    for i, ref in enumerate(refs):
+        commits[ref] = subprocess.check_output(
+            ["git", "-C", str(dest), "rev-parse", f"refs/analysis/{i}^{{commit}}"], text=True
+        ).strip()
+    return commits
+
+def _ls_tree(store: Path, ref: str) -> Dict[str, str]:
+    out = subprocess.check_output(["git", "-C", str(store), "ls-tree", "-r", "-z", ref])
+    tree: Dict[str, str] = {}
+    for entry in out.decode("utf-8", errors="surrogateescape").split("\0"):
+        if not entry:
+            continue
+        meta, path = entry.split("\t", 1)
+        _mode, kind, sha = meta.split()
+        if kind == "blob":
+            tree[path] = sha
+    return tree
+
+def _cat_blobs(store: Path, shas: List[str]) -> Dict[str, str]:
+    if not shas:
+        return {}
+    proc = subprocess.run(
+        ["git", "-C", str(store), "cat-file", "--batch"],
+        input="\n".join(shas).encode("utf-8") + b"\n", capture_output=True, check=True
+    )
+    out, pos, sources = proc.stdout, 0, {}
+    for sha in shas:
+        header_end = out.index(b"\n", pos)
+        size = int(out[pos:header_end].split()[2])
+        start = header_end + 1
+        sources[sha] = out[start:start + size].decode("utf-8", errors="ignore")
+        pos = start + size + 1
+    return sources
+
+def _changed_paths(base: Dict[str, str], other: Dict[str, str]) -> Dict[str, List[str]]:
+    return {
+        "added": sorted(set(other) - set(base)),
+        "removed": sorted(set(base) - set(other)),
+        "modified": sorted(p for p in set(base) & set(other) if base[p] != other[p]),
+    }
+
+def _graph_delta(base: Dict[str, Any], other: Dict[str, Any]) -> Dict[str, Any]:
+    base_edges = {tuple(e) for e in base["edges"]}
+    other_edges = {tuple(e) for e in other["edges"]}
+    base_unused, other_unused = base["unused_imports"], other["unused_imports"]
+    unused_added: Dict[str, List[str]] = {}
+    unused_removed: Dict[str, List[str]] = {}
+    for mod in set(base_unused) | set(other_unused):
+        a, b = set(base_unused.get(mod, [])), set(other_unused.get(mod, []))
+        if b - a:
+            unused_added[mod] = sorted(b - a)
+        if a - b:
+            unused_removed[mod] = sorted(a - b)
+    return {
+        "added_nodes": sorted(set(other["nodes"]) - set(base["nodes"])),
+        "removed_nodes": sorted(set(base["nodes"]) - set(other["nodes"])),
+        "added_edges": sorted(other_edges - base_edges),
+        "removed_edges": sorted(base_edges - other_edges),
+        "unused_added": unused_added,
+        "unused_removed": unused_removed,
+    }
+
 def _resolve_import_to_modules(key: str, current: str, all_mods: Set[str]) -> Set[str]:
     resolved: Set[str] = set()
     if key.startswith("."):
@@ -171,17 +334,37 @@ def _detect_unused(imports_map: Dict[str, Dict[str, Set[str]]]) -> Dict[str, Lis
     return out
 
 def _try_ruff_f401(repo_root: Path) -> Dict[str, List[str]]:
-    if shutil.which("ruff") is None:
+    result: Dict[str, List[str]] = {}
+    for filename, entry in _ruff_f401_records(repo_root) or []:
+        mod = _file_to_module(repo_root, Path(filename))
+        result.setdefault(mod, []).append(entry)
+    return result
+
+def _try_ruff_f401_tree(root: Path, files: Dict[str, str], sources: Dict[str, str]) -> Dict[str, List[str]]:
+    # Files are written at their repository paths, next to the ref's ruff config, so ruff resolves
+    # settings and package context (e.g. __init__.py) as it would in a checkout. Returns findings by path.
+    if not files or shutil.which("ruff") is None:
         return {}
+    for path, sha in files.items():
+        p = root / path
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(sources[sha], encoding="utf-8")
+    result: Dict[str, List[str]] = {}
+    for filename, entry in _ruff_f401_records(root) or []:
+        result.setdefault(Path(filename).relative_to(root).as_posix(), []).append(entry)
+    return result
+
+def _ruff_f401_records(target: Path) -> Optional[List[Tuple[str, str]]]:
+    if shutil.which("ruff") is None:
+        return None
     try:
         out = subprocess.check_output(
-            ["ruff","check","--select","F401","--output-format","json",str(repo_root)],
+            ["ruff","check","--select","F401","--exit-zero","--output-format","json",str(target)],
             stderr=subprocess.STDOUT, text=True
         )
         records = json.loads(out) if out.strip() else []
-        result: Dict[str, List[str]] = {}
+        result: List[Tuple[str, str]] = []
         for rec in records:
-            mod = _file_to_module(repo_root, Path(rec.get("filename","")))
             msg = rec.get("message","")
             name = ""
             if "`" in msg:
@@ -189,10 +372,10 @@ def _try_ruff_f401(repo_root: Path) -> Dict[str, List[str]]:
                 if len(parts) >= 2:
                     name = parts[1]
             entry = f"ruff::{name}" if name else f"ruff::{msg}"
-            result.setdefault(mod, []).append(entry)
+            result.append((rec.get("filename",""), entry))
         return result
     except Exception:
-        return {}
+        return None
 
 def _merge_unused(a: Dict[str, List[str]], b: Dict[str, List[str]]) -> Dict[str, List[str]]:
     keys = set(a) | set(b)
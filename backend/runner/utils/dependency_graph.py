@@ -0,0 +1,125 @@
+from backend.config import GRAPH_INDEX_MAX_SHARDS, GRAPH_INDEX_NODES_PER_SHARD
+from backend.runner.utils import graph_shard, job_io
+from typing import Any, Dict, Iterable, List, Sequence, Set
+import math
+
+# --- Public API ---
+def reverse_adjacency(nodes: Iterable[str], edges: Iterable[Sequence[str]]) -> Dict[str, List[str]]:
+    rev: Dict[str, Set[str]] = {n: set() for n in nodes}
+    for src, dst in edges:
+        rev.setdefault(dst, set()).add(src)
+        rev.setdefault(src, set())
+    return {n: sorted(ds) for n, ds in rev.items()}
+
+def degree(edges: Iterable[Sequence[str]]) -> Dict[str, int]:
+    deg: Dict[str, int] = {}
+    for a, b in edges:
+        deg[a] = deg.get(a, 0) + 1
+        deg[b] = deg.get(b, 0) + 1
+    return deg
+
+def transitive_impact(graph: Dict[str, Set[str]]) -> Dict[str, int]:
+    # Number of modules that transitively import each module. Cycles are collapsed first so every
+    # member of a strongly connected component is counted as a dependent of the others.
+    comps = _strongly_connected(graph)
+    comp_of = {n: i for i, members in enumerate(comps) for n in members}
+    bit = {n: i for i, n in enumerate(sorted(comp_of))}
+    masks = [0] * len(comps)
+    for i, members in enumerate(comps):
+        for n in members:
+            masks[i] |= 1 << bit[n]
+
+    preds: List[Set[int]] = [set() for _ in comps]
+    for src, dsts in graph.items():
+        for dst in dsts:
+            a, b = comp_of[src], comp_of[dst]
+            if a != b:
+                preds[b].add(a)
+
+    # Tarjan emits sinks first, so walking it backwards visits importers before the modules they import.
+    dependents = [0] * len(comps)
+    for i in reversed(range(len(comps))):
+        acc = 0
+        for p in preds[i]:
+            acc |= masks[p] | dependents[p]
+        dependents[i] = acc
+
+    out: Dict[str, int] = {}
+    for i, members in enumerate(comps):
+        size = dependents[i].bit_count() + len(members) - 1
+        for n in members:
+            out[n] = size
+    return out
+
+def shard_count(num_nodes: int) -> int:
+    return max(1, min(GRAPH_INDEX_MAX_SHARDS, math.ceil(num_nodes / GRAPH_INDEX_NODES_PER_SHARD)))
+
+def shard_of(module: str, shards: int) -> int:
+    return graph_shard.shard_of(module, shards)
+
+def write_index(job_id: str, payload: Dict[str, Any], top: int = 100) -> Dict[str, Any]:
+    nodes = payload.get("nodes") or []
+    edges = payload.get("edges") or []
+    impact = payload.get("impact") or {}
+    rev = reverse_adjacency(nodes, edges)
+
+    shards = shard_count(len(rev))
+    buckets: List[Dict[str, Any]] = [{} for _ in range(shards)]
+    for mod, dependents in rev.items():
+        buckets[shard_of(mod, shards)][mod] = {"dependents": dependents, "impact": impact.get(mod, 0)}
+    for i, bucket in enumerate(buckets):
+        job_io.write(f"jobs/{job_id}/graph/dependents/{i}.json", bucket)
+
+    ranked = sorted(rev, key=lambda m: (-impact.get(m, 0), m))[:top]
+    manifest = {
+        "shards": shards,
+        "nodes": len(rev),
+        "edges": len(edges),
+        "top_impact": [{"module": m, "impact": impact.get(m, 0)} for m in ranked],
+    }
+    job_io.write(f"jobs/{job_id}/graph/manifest.json", manifest)
+    return manifest
+
+# --- Internal helpers ---
+def _strongly_connected(graph: Dict[str, Set[str]]) -> List[List[str]]:
+    index: Dict[str, int] = {}
+    low: Dict[str, int] = {}
+    on_stack: Set[str] = set()
+    stack: List[str] = []
+    comps: List[List[str]] = []
+    counter = 0
+
+    nodes = set(graph) | {d for dsts in graph.values() for d in dsts}
+    for root in sorted(nodes):
+        if root in index:
+            continue
+        work = [(root, iter(sorted(graph.get(root, ()))))]
+        index[root] = low[root] = counter; counter += 1
+        stack.append(root); on_stack.add(root)
+        while work:
+            node, it = work[-1]
+            advanced = False
+            for nxt in it:
+                if nxt not in index:
+                    index[nxt] = low[nxt] = counter; counter += 1
+                    stack.append(nxt); on_stack.add(nxt)
+                    work.append((nxt, iter(sorted(graph.get(nxt, ())))))
+                    advanced = True
+                    break
+                if nxt in on_stack:
+                    low[node] = min(low[node], index[nxt])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                members = []
+                while True:
+                    n = stack.pop(); on_stack.discard(n)
+                    members.append(n)
+                    if n == node:
+                        break
+                comps.append(sorted(members))
+    return comps
@@ -0,0 +1,39 @@
+from typing import Dict, List, Optional, Tuple
+import re, subprocess
+
+COMMIT_ID = re.compile(r"[0-9a-fA-F]{40}")
+
+# --- Public API ---
+def is_commit_id(ref: str) -> bool:
+    return bool(COMMIT_ID.fullmatch(ref))
+
+def list_remote(repo_url: str, patterns: Optional[List[str]] = None, timeout: float = 60) -> Dict[str, str]:
+    # One ls-remote for all names; git matches each pattern against the tail of the ref names, so the
+    # peeled "<tag>^{}" entry of an annotated tag needs its own pattern.
+    args = [p for name in patterns or [] for p in (name, f"{name}^{{}}")]
+    out = subprocess.check_output(
+        ["git", "ls-remote", repo_url, *args], text=True, stderr=subprocess.DEVNULL, timeout=timeout
+    )
+    refs: Dict[str, str] = {}
+    for line in out.splitlines():
+        if "\t" in line:
+            sha, name = line.split("\t", 1)
+            refs[name] = sha
+    return refs
+
+# Returns (what to fetch, commit id) for a full commit id, a full ref name, or a short branch/tag name.
+def resolve(ref: str, remote: Dict[str, str]) -> Tuple[str, str]:
+    if is_commit_id(ref):
+        return ref.lower(), ref.lower()
+    for name in _candidates(ref):
+        if name in remote:
+            # Annotated tags are listed twice; the peeled "^{}" entry is the commit.
+            return name, remote.get(f"{name}^{{}}", remote[name])
+    raise ValueError(f"ref '{ref}' not found in remote")
+
+# --- Internal helpers ---
+def _candidates(ref: str) -> List[str]:
+    # Same precedence as git's rev-parse: exact, refs/<name>, tags, branches, remote-tracking refs.
+    if ref.startswith("refs/"):
+        return [ref]
+    return [ref, f"refs/{ref}", f"refs/tags/{ref}", f"refs/heads/{ref}", f"refs/remotes/{ref}", f"refs/remotes/{ref}/HEAD"]
@@ -0,0 +1,6 @@
+import hashlib
+
+# Shared by the runner (writing the dependents index) and the BFF (reading it); keep it dependency-free
+# so the BFF bundle can ship it on its own.
+def shard_of(module: str, shards: int) -> int:
+    return int(hashlib.sha1(module.encode("utf-8")).hexdigest()[:8], 16) % shards
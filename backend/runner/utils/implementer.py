@@ -1,4 +1,4 @@
-from backend.runner.utils import job_io
+from backend.runner.utils import job_io, metrics
 from pathlib import Path
 from typing import Any, Dict, List, Set, Tuple
 import ast, difflib, re, shutil, subprocess, tempfile
@@ -18,19 +18,22 @@ def implement_diff(job_id: str, repo_url: str, branch: str) -> Dict[str, Any]:
     tmpdir = tempfile.mkdtemp(prefix="implementer-")
     repo_root = Path(tmpdir) / "repo"
     try:
-        _shallow_clone(repo_url, branch or "main", repo_root)
+        with metrics.phase("clone"):
+            _shallow_clone(repo_url, branch or "main", repo_root)
+        metrics.count_path_bytes("bytes_cloned", repo_root)
 
         target = repo_root / rel_path
         if not target.exists():
             raise FileNotFoundError(f"Target file not found: {rel_path}")
 
-        original = target.read_text(encoding="utf-8", errors="ignore")
-        from_targets, import_targets = _parse_unused_targets(unused_imports)
-        modified = _transform_source(original, from_targets, import_targets)
-        if modified == original:
-            raise ValueError("No changes produced; nothing to diff")
+        with metrics.phase("transform"):
+            original = target.read_text(encoding="utf-8", errors="ignore")
+            from_targets, import_targets = _parse_unused_targets(unused_imports)
+            modified = _transform_source(original, from_targets, import_targets)
+            if modified == original:
+                raise ValueError("No changes produced; nothing to diff")
 
-        ast.parse(modified)
+            ast.parse(modified)
 
         diff_lines = list(difflib.unified_diff(
             original.splitlines(keepends=True),
@@ -65,6 +68,8 @@ def _parse_unused_targets(unused_list: List[str]) -> Tuple[Dict[str, Set[str]],
             continue
         lib, name = item.split("::", 1)
         lib, name = lib.strip(), name.strip()
+        if lib == "ruff":
+            continue
         if lib == name:
             import_targets.add(lib)
         else:
@@ -1,40 +1,111 @@
 from backend.config import AWS_REGION, BUCKET_NAME, LOCAL_AWS, LOCAL_S3_ROOT
+from backend.runner.utils import artifact_codec, metrics
+from botocore.exceptions import ClientError
 from typing import Dict, Any, Optional, Tuple
-import boto3, json
+import boto3, hashlib, os, threading, uuid
 
 _s3 = boto3.client("s3", region_name=AWS_REGION)
 
+# Local mode emulates S3 conditional writes; the check-and-write must not interleave between threads.
+_local_cas_lock = threading.Lock()
+
 def load(job_id: str, file_name: str) -> Optional[Dict[str, Any]]:
     key = f"jobs/{job_id}/{file_name}.json"
     return read(key)
 
 def read(key: str) -> Optional[Dict[str, Any]]:
+    metrics.count("s3_get_requests")
     if LOCAL_AWS:
         p = LOCAL_S3_ROOT / key
         if not p.exists():
             return None
-        return json.loads(p.read_text(encoding="utf-8"))
+        raw = p.read_bytes()
+        metrics.count("s3_bytes_in", len(raw))
+        return artifact_codec.decode(raw)
     try:
         obj = _s3.get_object(Bucket=BUCKET_NAME, Key=key)
-        return json.loads(obj["Body"].read().decode("utf-8"))
+        raw = obj["Body"].read()
+        metrics.count("s3_bytes_in", len(raw))
+        return artifact_codec.decode(raw)
     except _s3.exceptions.NoSuchKey:
         return None
 
+# Returns the object with a version tag to pass to write_if (None when the key does not exist).
+def read_versioned(key: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    metrics.count("s3_get_requests")
+    if LOCAL_AWS:
+        p = LOCAL_S3_ROOT / key
+        if not p.exists():
+            return None, None
+        raw = p.read_bytes()
+        metrics.count("s3_bytes_in", len(raw))
+        return artifact_codec.decode(raw), _local_etag(raw)
+    try:
+        obj = _s3.get_object(Bucket=BUCKET_NAME, Key=key)
+        raw = obj["Body"].read()
+        metrics.count("s3_bytes_in", len(raw))
+        return artifact_codec.decode(raw), obj["ETag"]
+    except _s3.exceptions.NoSuchKey:
+        return None, None
+
+# Writes only if the object is still at `etag` (or still absent when etag is None); False if another writer won.
+def write_if(key: str, data: Dict[str, Any], etag: Optional[str]) -> bool:
+    codec = artifact_codec.codec_for_key(key)
+    body, content_type, content_encoding = artifact_codec.encode(data, codec, pretty=LOCAL_AWS)
+    metrics.count("s3_put_requests")
+    metrics.count("s3_bytes_out", len(body))
+    if LOCAL_AWS:
+        p = LOCAL_S3_ROOT / key
+        with _local_cas_lock:
+            current = _local_etag(p.read_bytes()) if p.exists() else None
+            if current != etag:
+                return False
+            _local_write(p, body)
+        return True
+
+    extra = {"ContentEncoding": content_encoding} if content_encoding else {}
+    extra.update({"IfMatch": etag} if etag else {"IfNoneMatch": "*"})
+    try:
+        _s3.put_object(Bucket=BUCKET_NAME, Key=key, Body=body, ContentType=content_type, **extra)
+        return True
+    except ClientError as e:
+        # 412: the object changed since it was read; 409: a concurrent conditional write is in flight.
+        if e.response.get("Error", {}).get("Code") in ("PreconditionFailed", "ConditionalRequestConflict"):
+            return False
+        raise
+
 def update(job_id: str, file_name: str, patch: Dict[str, Any]) -> None:
     key = f"jobs/{job_id}/{file_name}.json"
     job = read(key) or {}
     job.update(patch)
     write(key, job)
 
-def write(key: str, data: Dict[str, Any]) -> None:
+def write(key: str, data: Dict[str, Any], codec: Optional[str] = None) -> None:
+    codec = artifact_codec.available(codec) if codec else artifact_codec.codec_for_key(key)
+    body, content_type, content_encoding = artifact_codec.encode(data, codec, pretty=LOCAL_AWS)
+    write_bytes(key, body, content_type, content_encoding)
+
+def write_bytes(key: str, body: bytes, content_type: str = "application/octet-stream", content_encoding: Optional[str] = None) -> None:
+    metrics.count("s3_put_requests")
+    metrics.count("s3_bytes_out", len(body))
     if LOCAL_AWS:
-        p = LOCAL_S3_ROOT / key
-        p.parent.mkdir(parents=True, exist_ok=True)
-        p.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        _local_write(LOCAL_S3_ROOT / key, body)
     else:
+        extra = {"ContentEncoding": content_encoding} if content_encoding else {}
         _s3.put_object(
             Bucket=BUCKET_NAME,
             Key=key,
-            Body=json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8"),
-            ContentType="application/json",
-        )
\ No newline at end of file
+            Body=body,
+            ContentType=content_type,
+            **extra,
+        )
+
+# Replace rather than truncate, so concurrent readers never see a half-written object (as with S3).
+def _local_write(p, body: bytes) -> None:
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_name(f".{p.name}.{uuid.uuid4().hex}")
+    tmp.write_bytes(body)
+    os.replace(tmp, p)
+
+def _local_etag(raw: bytes) -> str:
+    return hashlib.md5(raw).hexdigest()
@@ -0,0 +1,177 @@
+from backend.config import LLM_CACHE_PREFIX, LLM_ENDPOINT, LLM_MAX_CONCURRENCY, LLM_MAX_RETRIES, LLM_MODEL, LLM_TIMEOUT
+from backend.runner.utils import job_io
+from collections import OrderedDict
+from requests.adapters import HTTPAdapter
+from typing import Any, Dict, List, Optional
+import hashlib, json, os, random, requests, threading, time
+
+DEFAULT_ENDPOINT = "https://api.openai.com/v1/chat/completions"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MEMORY_CACHE_SIZE = 1024
+RETRY_AFTER_CAP = 60.0
+
+class LLMError(Exception):
+    pass
+
+# --- Client ---
+class LLMClient:
+    def __init__(
+        self,
+        endpoint: str = LLM_ENDPOINT,
+        api_key: Optional[str] = None,
+        model: str = LLM_MODEL,
+        timeout: float = LLM_TIMEOUT,
+        max_retries: int = LLM_MAX_RETRIES,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 8.0,
+    ) -> None:
+        self.endpoint = endpoint
+        self.api_key = (api_key if api_key is not None else os.getenv("OPEN_API_KEY", "")).strip()
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+        # Keep-alive pool sized to the concurrency cap so every permitted request can reuse a connection.
+        pool_size = max(1, max_concurrency)
+        self.max_concurrency = pool_size
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._slots = threading.BoundedSemaphore(pool_size)
+
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        # A custom endpoint (e.g. a local stub server) does not need a real key.
+        return bool(self.api_key) or self.endpoint != DEFAULT_ENDPOINT
+
+    def complete(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.2,
+        max_tokens: int = 60,
+        cache_key: Optional[str] = None,
+    ) -> str:
+        if cache_key:
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return cached
+
+        data = self._post({
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        })
+        content = (data.get("choices") or [{}])[0].get("message", {}).get("content", "").strip()
+
+        if cache_key and content:
+            self._cache_put(cache_key, content)
+        return content
+
+    def lookup(self, cache_key: str) -> Optional[str]:
+        return self._cache_get(cache_key)
+
+    def store(self, cache_key: str, content: str) -> None:
+        if content:
+            self._cache_put(cache_key, content)
+
+    # Upper bound for one complete() call: every attempt times out and every retry waits the longest allowed delay.
+    def request_budget(self) -> float:
+        return self.timeout * (self.max_retries + 1) + max(self.backoff_cap, RETRY_AFTER_CAP) * self.max_retries
+
+    def close(self) -> None:
+        self.session.close()
+
+    # --- Internal helpers ---
+    def _post(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+
+        last_error = ""
+        for attempt in range(self.max_retries + 1):
+            retry_after: Optional[float] = None
+            with self._slots:
+                try:
+                    resp = self.session.post(self.endpoint, headers=headers, json=payload, timeout=self.timeout)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    last_error = str(e)
+                    resp = None
+                if resp is not None:
+                    if resp.status_code not in RETRY_STATUSES:
+                        resp.raise_for_status()
+                        return resp.json()
+                    last_error = f"HTTP {resp.status_code}"
+                    retry_after = _parse_retry_after(resp.headers.get("Retry-After"))
+
+            if attempt < self.max_retries:
+                time.sleep(retry_after if retry_after is not None else self._backoff(attempt))
+
+        raise LLMError(f"LLM request failed after {self.max_retries + 1} attempts: {last_error}")
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_cap, self.backoff_base * (2 ** attempt))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _cache_get(self, cache_key: str) -> Optional[str]:
+        with self._cache_lock:
+            if cache_key in self._cache:
+                self._cache.move_to_end(cache_key)
+                return self._cache[cache_key]
+        try:
+            stored = job_io.read(f"{LLM_CACHE_PREFIX}/{cache_key}.json")
+        except Exception:
+            stored = None
+        content = (stored or {}).get("content")
+        if content:
+            self._remember(cache_key, content)
+        return content or None
+
+    def _cache_put(self, cache_key: str, content: str) -> None:
+        self._remember(cache_key, content)
+        try:
+            job_io.write(f"{LLM_CACHE_PREFIX}/{cache_key}.json", {"model": self.model, "content": content})
+        except Exception:
+            pass
+
+    def _remember(self, cache_key: str, content: str) -> None:
+        with self._cache_lock:
+            self._cache[cache_key] = content
+            self._cache.move_to_end(cache_key)
+            while len(self._cache) > MEMORY_CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+# --- Public API ---
+_client: Optional[LLMClient] = None
+_client_lock = threading.Lock()
+
+def get_client() -> LLMClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient()
+        return _client
+
+def set_client(client: Optional[LLMClient]) -> None:
+    global _client
+    with _client_lock:
+        _client = client
+
+def hash_key(*parts: Any) -> str:
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return min(RETRY_AFTER_CAP, max(0.0, float(value)))
+    except ValueError:
+        return None
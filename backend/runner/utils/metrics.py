@@ -0,0 +1,169 @@
+from backend.config import LOCAL_AWS
+from backend.runner.utils import job_io
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+import cProfile, io, logging, marshal, os, sys, time
+
+try:
+    import resource
+except ImportError:  # Non-Unix hosts: RSS and child CPU are reported as 0.
+    resource = None
+
+log = logging.getLogger()
+
+PROC_STATUS = Path("/proc/self/status")
+PROC_CLEAR_REFS = Path("/proc/self/clear_refs")
+
+# --- Recorder ---
+class StageMetrics:
+    def __init__(self, job_id: str, stage: str) -> None:
+        self.job_id = job_id
+        self.stage = stage
+        self.totals: Dict[str, float] = {}
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, Union[int, float]] = {}
+        # Peak RSS and child CPU are only attributable to a stage when the process runs nothing else
+        # (one job per Lambda invocation); local mode runs jobs as threads, so there they are process-wide.
+        self.per_scope = not LOCAL_AWS and os.access(PROC_CLEAR_REFS, os.W_OK)
+        self._open: List[Dict[str, float]] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**self.totals, "phases": self.phases, "counters": self.counters}
+
+_current: ContextVar[Optional[StageMetrics]] = ContextVar("runner_stage_metrics", default=None)
+
+# --- Public API ---
+@contextmanager
+def record_stage(job_id: str, stage: str, profile: bool = False) -> Iterator[StageMetrics]:
+    rec = StageMetrics(job_id, stage)
+    token = _current.set(rec)
+    profiler = cProfile.Profile() if profile else None
+    peak = _open_scope(rec)
+    start = _snapshot()
+    if profiler:
+        try:
+            profiler.enable()
+        except ValueError:  # Another profiler is already active in this process.
+            profiler = None
+    try:
+        yield rec
+    finally:
+        if profiler:
+            profiler.disable()
+        rec.totals = _delta(start, _snapshot())
+        rec.totals["peak_rss_mb"] = _close_scope(rec, peak)
+        rec.totals["scope"] = "stage" if rec.per_scope else "process"
+        _current.reset(token)
+        _persist(rec, profiler)
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    rec = _current.get()
+    if rec is None:
+        yield
+        return
+    peak = _open_scope(rec)
+    start = _snapshot()
+    try:
+        yield
+    finally:
+        d = _delta(start, _snapshot())
+        d["peak_rss_mb"] = _close_scope(rec, peak)
+        agg = rec.phases.setdefault(name, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "child_cpu_s": 0.0, "peak_rss_mb": 0.0})
+        agg["calls"] += 1
+        for k in ("wall_s", "cpu_s", "child_cpu_s"):
+            agg[k] = round(agg[k] + d[k], 6)
+        agg["peak_rss_mb"] = max(agg["peak_rss_mb"], d["peak_rss_mb"])
+
+def count(name: str, n: Union[int, float] = 1) -> None:
+    rec = _current.get()
+    if rec is not None:
+        rec.counters[name] = rec.counters.get(name, 0) + n
+
+def count_path_bytes(name: str, root: Path) -> None:
+    if _current.get() is None:
+        return
+    total = 0
+    for dirpath, _dirs, files in os.walk(root):
+        for f in files:
+            try:
+                total += os.lstat(os.path.join(dirpath, f)).st_size
+            except OSError:
+                pass
+    count(name, total)
+
+# --- Internal helpers ---
+def _snapshot() -> Dict[str, float]:
+    snap = {"wall": time.perf_counter(), "cpu": time.thread_time(), "child_cpu": 0.0, "rss_mb": 0.0}
+    if resource is not None:
+        self_usage = resource.getrusage(resource.RUSAGE_SELF)
+        child_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        snap["child_cpu"] = child_usage.ru_utime + child_usage.ru_stime
+        snap["rss_mb"] = max(_maxrss_mb(self_usage.ru_maxrss), _maxrss_mb(child_usage.ru_maxrss))
+    return snap
+
+def _delta(a: Dict[str, float], b: Dict[str, float]) -> Dict[str, float]:
+    return {
+        "wall_s": round(b["wall"] - a["wall"], 6),
+        "cpu_s": round(b["cpu"] - a["cpu"], 6),
+        "child_cpu_s": round(b["child_cpu"] - a["child_cpu"], 6),
+    }
+
+# Each open scope (the stage and any enclosing phases) keeps its own peak. Before the kernel's high-water
+# mark is reset for a new scope, the value so far is credited to the scopes already open.
+def _open_scope(rec: StageMetrics) -> Dict[str, float]:
+    peak = {"rss_mb": 0.0}
+    if rec.per_scope:
+        _fold_hwm(rec)
+        rec.per_scope = _reset_hwm()
+    rec._open.append(peak)
+    return peak
+
+def _close_scope(rec: StageMetrics, peak: Dict[str, float]) -> float:
+    if rec.per_scope:
+        _fold_hwm(rec)
+    rec._open.remove(peak)
+    if rec.per_scope:
+        return round(peak["rss_mb"], 1)
+    return round(_snapshot()["rss_mb"], 1)
+
+def _fold_hwm(rec: StageMetrics) -> None:
+    hwm = _read_hwm_mb()
+    for peak in rec._open:
+        peak["rss_mb"] = max(peak["rss_mb"], hwm)
+
+def _read_hwm_mb() -> float:
+    try:
+        for line in PROC_STATUS.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0.0
+
+def _reset_hwm() -> bool:
+    # Writing "5" resets VmHWM to the current RSS (Linux >= 4.0).
+    try:
+        PROC_CLEAR_REFS.write_text("5")
+        return True
+    except OSError:
+        return False
+
+def _maxrss_mb(value: int) -> float:
+    # ru_maxrss is kilobytes on Linux and bytes on macOS.
+    return value / (1024 * 1024) if sys.platform == "darwin" else value / 1024
+
+def _persist(rec: StageMetrics, profiler: Optional[cProfile.Profile]) -> None:
+    payload = rec.to_dict()
+    log.info({"event": "runner_stage_metrics", "job_id": rec.job_id, "stage": rec.stage, **payload})
+    try:
+        job_io.update(rec.job_id, "metrics", {rec.stage: payload})
+        if profiler:
+            profiler.create_stats()
+            buf = io.BytesIO()
+            marshal.dump(profiler.stats, buf)
+            job_io.write_bytes(f"jobs/{rec.job_id}/profile.{rec.stage}.prof", buf.getvalue())
+    except Exception as e:
+        log.error({"event": "runner_metrics_write_failed", "job_id": rec.job_id, "stage": rec.stage, "error": str(e),})
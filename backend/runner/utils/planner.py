@@ -1,14 +1,16 @@
-from typing import Any, Dict, Tuple
-from backend.runner.utils import job_io
+from typing import Any, Dict, List, Tuple
+from backend.runner.utils import dependency_graph, job_io, metrics
 
 # --- Public API ---
 def plan_single_file(job_id: str) -> Dict[str, Any]:
-    deps = job_io.load(job_id, "dependency")
+    with metrics.phase("load"):
+        deps = job_io.load(job_id, "dependency")
     if not isinstance(deps, dict):
         raise ValueError("dependency.json is missing or not a JSON object")
 
-    candidate, reason = _pick_candidate(deps)
-    unused_imports = list((deps.get("unused_imports") or {}).get(candidate, []))
+    with metrics.phase("plan"):
+        candidate, reason = _pick_candidate(deps)
+    unused_imports = _actionable(deps).get(candidate, [])
     if not unused_imports:
         raise ValueError(f"No unused imports found for candidate module '{candidate}'")
 
@@ -19,28 +21,36 @@ def plan_single_file(job_id: str) -> Dict[str, Any]:
     }
 
 # --- Internal helpers ---
+# "ruff::" findings are reported for context only; the implementer can only remove imports found by the AST pass.
+def _actionable(deps: Dict[str, Any]) -> Dict[str, List[str]]:
+    out: Dict[str, List[str]] = {}
+    for mod, items in (deps.get("unused_imports") or {}).items():
+        kept = [i for i in items if not i.startswith("ruff::")]
+        if kept:
+            out[mod] = kept
+    return out
+
 def _pick_candidate(deps: Dict[str, Any]) -> Tuple[str, str]:
-    unused = deps.get("unused_imports") or {}
+    unused = _actionable(deps)
     if not unused:
         raise ValueError("No modules have unused imports; nothing to plan.")
     candidates = set(unused.keys())
 
-    deg: Dict[str, int] = {}
-    for a, b in deps.get("edges", []):
-        deg[a] = deg.get(a, 0) + 1
-        deg[b] = deg.get(b, 0) + 1
+    deg: Dict[str, int] = deps.get("degree") or dependency_graph.degree(deps.get("edges", []))
+    impact: Dict[str, int] = deps.get("impact") or {}
 
     topo_pos = {m: i for i, m in enumerate(deps.get("topo_order", []))}
 
     ordered = sorted(
         candidates,
-        key=lambda m: (deg.get(m, 0), topo_pos.get(m, 10**9), m)
+        key=lambda m: (impact.get(m, 0), deg.get(m, 0), topo_pos.get(m, 10**9), m)
     )
     candidate = ordered[0]
 
     reason = (
         f"Selected '{candidate}' because it contains unused imports "
-        f"and appears low-impact (dependency degree={deg.get(candidate, 0)}). "
+        f"and appears low-impact (transitive dependents={impact.get(candidate, 0)}, "
+        f"dependency degree={deg.get(candidate, 0)}). "
         + ("Topo order was considered for tie-breaking. " if candidate in topo_pos else "")
     )
 
@@ -1,7 +1,8 @@
-from backend.runner.utils import job_io
+from backend.config import SUMMARY_SHARED
+from backend.runner.utils import job_io, llm_client, metrics, summary_queue
 from pathlib import Path
-from typing import Any, List, Dict
-import json, os, requests, shutil, subprocess, tempfile
+from typing import Any, List, Dict, Optional
+import json, shutil, subprocess, tempfile
 
 # --- Public API ---
 def review_diff(job_id: str, repo_url: str, branch: str) -> Dict[str, Any]:
@@ -14,23 +15,30 @@ def review_diff(job_id: str, repo_url: str, branch: str) -> Dict[str, Any]:
     tmpdir = tempfile.mkdtemp(prefix="reviewer-")
     repo_root = Path(tmpdir) / "repo"
     try:
-        _shallow_clone(repo_url, (branch or "main"), repo_root)
+        with metrics.phase("clone"):
+            _shallow_clone(repo_url, (branch or "main"), repo_root)
+        metrics.count_path_bytes("bytes_cloned", repo_root)
 
         patch_text = diff.get("patch")
         if patch_text:
-            _apply_patch(repo_root, patch_text)
+            with metrics.phase("patch"):
+                _apply_patch(repo_root, patch_text)
 
         target = repo_root / rel_path
         if not target.exists():
             raise FileNotFoundError(f"Target file not found after patch: {rel_path}")
 
-        lint_items = _run_ruff(repo_root, [rel_path])
-        summary = _llm_summary(lint_items)
-
-        return {
-            "lint_issues": {"count": len(lint_items), "items": lint_items},
-            "summary": summary,
-        }
+        with metrics.phase("ruff"):
+            lint_items = _run_ruff(repo_root, [rel_path])
+        payload = {"lint_issues": {"count": len(lint_items), "items": lint_items}}
+        sample = _summary_sample(lint_items)
+        if sample is not None and SUMMARY_SHARED:
+            # Sent with other jobs' findings by defer_summary() once review.json has been written.
+            payload.update({"summary": "Summary pending.", "summary_status": "pending", "summary_sample": sample})
+        else:
+            with metrics.phase("llm"):
+                payload["summary"] = _llm_summary(sample)
+        return payload
     finally:
         shutil.rmtree(tmpdir, ignore_errors=True)
 
@@ -74,34 +82,24 @@ def _run_ruff(repo_dir: Path, files: List[str]) -> List[Dict[str, Any]]:
             })
     return items
 
-def _llm_summary(lint_items: List[Dict[str, Any]]) -> str:
-    key = os.getenv("OPEN_API_KEY", "").strip()
-    if not key:
-        return "Review done: ruff executed (no LLM key)."
-
-    sample = "\n".join(f"{i['file']}:{i.get('line')} {i.get('code')} {i.get('message')}" for i in lint_items[:5]) or "No lint issues found."
+# Runs after review.json is written, so the batch sender's summary patch cannot be overwritten by it.
+def defer_summary(job_id: str, sample: str) -> None:
+    with metrics.phase("llm"):
+        try:
+            summary_queue.defer(job_id, sample)
+        except Exception:
+            job_io.update(job_id, "review", {"summary": summary_queue.SUMMARY_FAILED, "summary_status": "failed",})
 
-    prompt = (
-        "Summarise these ruff findings in one concise sentence "
-        "for a commit message.\n\n" + sample
-    )
+def _summary_sample(lint_items: List[Dict[str, Any]]) -> Optional[str]:
+    if not llm_client.get_client().enabled:
+        return None
+    return "\n".join(f"{i['file']}:{i.get('line')} {i.get('code')} {i.get('message')}" for i in lint_items[:5]) or "No lint issues found."
 
+def _llm_summary(sample: Optional[str]) -> str:
+    if sample is None:
+        return "Review done: ruff executed (no LLM key)."
     try:
-        resp = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers={"Authorization": f"Bearer {key}", "Content-Type": "application/json"},
-            json={
-                "model": "gpt-4o-mini",
-                "messages": [
-                    {"role": "system", "content": "You are a Python reviewer."},
-                    {"role": "user", "content": prompt},
-                ],
-                "temperature": 0.2,
-                "max_tokens": 60,
-            },
-            timeout=15,
-        )
-        data = resp.json()
-        return data.get("choices", [{}])[0].get("message", {}).get("content", "").strip() or "Review complete: no additional comments."
+        content = summary_queue.get_queue().summarise(sample)
+        return content or summary_queue.SUMMARY_EMPTY
     except Exception:
-        return "Review done: ruff executed (LLM failed)."
\ No newline at end of file
+        return summary_queue.SUMMARY_FAILED
\ No newline at end of file
@@ -0,0 +1,266 @@
+from backend.config import SUMMARY_BATCH_MAX, SUMMARY_BATCH_WINDOW, SUMMARY_SHARED_KEY, SUMMARY_SHARED_WINDOW
+from backend.runner.utils import job_io, llm_client
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import json, logging, math, random, threading, time, uuid
+
+log = logging.getLogger()
+
+SYSTEM_PROMPT = "You are a Python reviewer."
+SUMMARY_MAX_TOKENS = 60
+SUMMARY_FAILED = "Review done: ruff executed (LLM failed)."
+SUMMARY_EMPTY = "Review complete: no additional comments."
+# A window still open this long after it should have closed belongs to an invocation that died.
+SHARED_CLAIM_GRACE = 60.0
+SHARED_CAS_ATTEMPTS = 10
+
+# --- Queue ---
+class _Pending:
+    __slots__ = ("sample", "prompt", "cache_key", "future")
+
+    def __init__(self, sample: str, prompt: str, cache_key: str) -> None:
+        self.sample = sample
+        self.prompt = prompt
+        self.cache_key = cache_key
+        self.future: Future = Future()
+
+class SummaryQueue:
+    def __init__(
+        self,
+        client: Optional[llm_client.LLMClient] = None,
+        window: float = SUMMARY_BATCH_WINDOW,
+        max_items: int = SUMMARY_BATCH_MAX,
+    ) -> None:
+        self._client = client
+        self.window = max(0.0, window)
+        self.max_items = max(1, max_items)
+        self._items: List[_Pending] = []
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._worker: Optional[threading.Thread] = None
+
+    @property
+    def client(self) -> llm_client.LLMClient:
+        return self._client or llm_client.get_client()
+
+    def submit(self, sample: str) -> Future:
+        prompt = single_prompt(sample)
+        item = _Pending(sample, prompt, llm_client.hash_key(self.client.model, prompt))
+        if self.window == 0:
+            # No window: nothing else can join the batch, so skip the worker hand-off entirely.
+            self._flush([item])
+            return item.future
+        with self._lock:
+            self._items.append(item)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+            if len(self._items) >= self.max_items:
+                self._ready.notify()
+        return item.future
+
+    def summarise(self, sample: str, timeout: Optional[float] = None) -> str:
+        if timeout is None:
+            timeout = self.timeout_budget()
+        return self.submit(sample).result(timeout)
+
+    # Worst case for one waiter: the window, the batch request, then per-item fallbacks run
+    # max_concurrency at a time.
+    def timeout_budget(self) -> float:
+        c = self.client
+        rounds = 1 + math.ceil(self.max_items / c.max_concurrency)
+        return self.window + c.request_budget() * rounds
+
+    # --- Internal helpers ---
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                deadline = time.monotonic() + self.window
+                while len(self._items) < self.max_items:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._ready.wait(remaining)
+                batch = self._items[: self.max_items]
+                del self._items[: self.max_items]
+                if not batch:
+                    self._worker = None
+                    return
+            self._flush(batch)
+
+    def _flush(self, batch: List[_Pending]) -> None:
+        client = self.client
+        groups: Dict[str, List[_Pending]] = {}
+        for item in batch:
+            cached = client.lookup(item.cache_key)
+            if cached is not None:
+                item.future.set_result(cached)
+            else:
+                groups.setdefault(item.cache_key, []).append(item)
+        # Identical findings share one slot in the prompt.
+        pending = [items[0] for items in groups.values()]
+
+        if len(pending) > 1:
+            try:
+                results = self._complete_batch(client, pending)
+            except Exception as e:
+                # Retries are already exhausted (e.g. on 429s); N separate requests would only add load.
+                log.info({"event": "summary_batch_failed", "size": len(pending), "error": str(e),})
+                for item in pending:
+                    for waiter in groups[item.cache_key]:
+                        waiter.future.set_exception(e)
+                return
+            if results is not None:
+                for item, content in zip(pending, results):
+                    client.store(item.cache_key, content)
+                    for waiter in groups[item.cache_key]:
+                        waiter.future.set_result(content)
+                log.info({"event": "summary_batch_completed", "size": len(pending), "jobs": len(batch),})
+                return
+            log.info({"event": "summary_batch_fallback", "size": len(pending), "error": "unparseable batch reply",})
+
+        if not pending:
+            return
+        if len(pending) == 1:
+            self._complete_single(client, pending[0], groups[pending[0].cache_key])
+            return
+        # The client's semaphore caps in-flight requests; the pool just keeps that many busy.
+        with ThreadPoolExecutor(max_workers=min(len(pending), client.max_concurrency)) as pool:
+            for item in pending:
+                pool.submit(self._complete_single, client, item, groups[item.cache_key])
+
+    def _complete_single(self, client: llm_client.LLMClient, item: _Pending, waiters: List[_Pending]) -> None:
+        try:
+            content = client.complete(
+                [
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": item.prompt},
+                ],
+                temperature=0.2,
+                max_tokens=SUMMARY_MAX_TOKENS,
+                cache_key=item.cache_key,
+            )
+            for waiter in waiters:
+                waiter.future.set_result(content)
+        except Exception as e:
+            for waiter in waiters:
+                waiter.future.set_exception(e)
+
+    def _complete_batch(self, client: llm_client.LLMClient, items: List[_Pending]) -> Optional[List[str]]:
+        content = client.complete(
+            [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": batch_prompt([i.sample for i in items])},
+            ],
+            temperature=0.2,
+            max_tokens=SUMMARY_MAX_TOKENS * len(items),
+        )
+        return _parse_batch(content, len(items))
+
+# --- Public API ---
+_queue: Optional[SummaryQueue] = None
+_queue_lock = threading.Lock()
+
+def get_queue() -> SummaryQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = SummaryQueue()
+        return _queue
+
+# Queues a job's findings in the job store and writes the summary into its review artifact once the batch
+# is sent. The invocation that opens a window waits for it to close and submits the batch; one that fills
+# the batch, or finds a window whose owner died, submits it straight away. Others return immediately.
+def defer(job_id: str, sample: str, client: Optional[llm_client.LLMClient] = None) -> None:
+    client = client or llm_client.get_client()
+    entry = {"job_id": job_id, "sample": sample, "cache_key": llm_client.hash_key(client.model, single_prompt(sample))}
+    cached = client.lookup(entry["cache_key"])
+    if cached is not None:
+        _write_summary(job_id, cached, "done")
+        return
+
+    now = time.time()
+
+    def enqueue(state: Dict[str, Any]) -> Tuple[Dict[str, Any], Tuple[str, Any]]:
+        items = list(state.get("items") or [])
+        stale = bool(items) and now > state.get("opened_at", 0) + SUMMARY_SHARED_WINDOW + SHARED_CLAIM_GRACE
+        items.append(entry)
+        if stale or len(items) >= SUMMARY_BATCH_MAX:
+            return {"items": []}, ("send", items)
+        if len(items) == 1:
+            batch_id = uuid.uuid4().hex
+            return {"batch_id": batch_id, "opened_at": now, "items": items}, ("own", batch_id)
+        return {**state, "items": items}, ("wait", None)
+
+    action, arg = _shared_transact(enqueue)
+    log.info({"event": "summary_deferred", "job_id": job_id, "action": action,})
+    if action == "wait":
+        return
+    if action == "own":
+        time.sleep(max(0.0, now + SUMMARY_SHARED_WINDOW - time.time()))
+
+        def claim(state: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Any]:
+            if state.get("batch_id") != arg:
+                return None, []  # Already sent by an invocation that filled the batch.
+            return {"items": []}, state.get("items") or []
+
+        arg = _shared_transact(claim)
+    if arg:
+        _send_shared(client, arg)
+
+def single_prompt(sample: str) -> str:
+    return (
+        "Summarise these ruff findings in one concise sentence "
+        "for a commit message.\n\n" + sample
+    )
+
+def batch_prompt(samples: List[str]) -> str:
+    sections = "\n\n".join(f"### {i}\n{s}" for i, s in enumerate(samples, start=1))
+    return (
+        f"Below are {len(samples)} numbered sets of ruff findings. Summarise each set in one concise sentence "
+        f"for a commit message. Reply with only a JSON array of {len(samples)} strings, in the same order.\n\n"
+        + sections
+    )
+
+def _shared_transact(apply: Callable[[Dict[str, Any]], Tuple[Optional[Dict[str, Any]], Any]]) -> Any:
+    # Same optimistic-concurrency loop as admission: apply() returns the new state (None to leave it) and a result.
+    for attempt in range(SHARED_CAS_ATTEMPTS):
+        state, etag = job_io.read_versioned(SUMMARY_SHARED_KEY)
+        new_state, result = apply(state or {})
+        if new_state is None or job_io.write_if(SUMMARY_SHARED_KEY, new_state, etag):
+            return result
+        time.sleep(random.uniform(0, min(1.0, 0.05 * 2 ** attempt)))
+    raise RuntimeError("summary queue is contended; giving up after retries")
+
+def _send_shared(client: llm_client.LLMClient, entries: List[Dict[str, Any]]) -> None:
+    batch = []
+    for e in entries:
+        item = _Pending(e["sample"], single_prompt(e["sample"]), e["cache_key"])
+        item.future.add_done_callback(partial(_on_shared_result, e["job_id"]))
+        batch.append(item)
+    log.info({"event": "summary_shared_batch", "size": len(batch), "jobs": [e["job_id"] for e in entries],})
+    SummaryQueue(client, window=0)._flush(batch)
+
+def _on_shared_result(job_id: str, future: Future) -> None:
+    try:
+        _write_summary(job_id, future.result() or SUMMARY_EMPTY, "done")
+    except Exception as e:
+        log.error({"event": "summary_shared_failed", "job_id": job_id, "error": str(e),})
+        _write_summary(job_id, SUMMARY_FAILED, "failed")
+
+def _write_summary(job_id: str, summary: str, status: str) -> None:
+    job_io.update(job_id, "review", {"summary": summary, "summary_status": status,})
+
+def _parse_batch(content: str, expected: int) -> Optional[List[str]]:
+    text = content.strip()
+    start, end = text.find("["), text.rfind("]")
+    if start < 0 or end < start:
+        return None
+    try:
+        data = json.loads(text[start : end + 1])
+    except ValueError:
+        return None
+    if not isinstance(data, list) or len(data) != expected:
+        return None
+    return [str(s).strip() for s in data]
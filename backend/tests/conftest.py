@@ -0,0 +1,69 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import json, os, sys, threading, time
+
+# Tests always run against the local job store and never reach a real LLM endpoint.
+os.environ["LOCAL_AWS"] = "true"
+os.environ["OPEN_API_KEY"] = ""
+os.environ.pop("LLM_ENDPOINT", None)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import pytest
+
+@pytest.fixture(autouse=True)
+def local_store(tmp_path, monkeypatch):
+    # LOCAL_S3_ROOT is relative, so every test gets its own store.
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+class StubLLM:
+    """Chat-completions stand-in on localhost; tests set `reply(payload) -> (status, content, headers)`."""
+
+    def __init__(self) -> None:
+        self.requests = []
+        self.delay = 0.0
+        self.inflight = 0
+        self.max_inflight = 0
+        self.reply = lambda payload: (200, "ok", {})
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub._lock:
+                    stub.requests.append(payload)
+                    stub.inflight += 1
+                    stub.max_inflight = max(stub.max_inflight, stub.inflight)
+                try:
+                    if stub.delay:
+                        time.sleep(stub.delay)
+                    status, content, headers = stub.reply(payload)
+                finally:
+                    with stub._lock:
+                        stub.inflight -= 1
+                body = json.dumps({"choices": [{"message": {"content": content}}]}).encode("utf-8")
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/v1/chat/completions"
+        threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def llm_stub():
+    stub = StubLLM()
+    yield stub
+    stub.close()
@@ -0,0 +1,93 @@
+from backend.config import ADMISSION_STATE_KEY
+from backend.runner.utils import admission, job_io
+import contextlib, threading
+import pytest
+
+REPO = "https://github.com/example/repo"
+
+@pytest.fixture(autouse=True)
+def commits(monkeypatch):
+    resolved = {}
+    monkeypatch.setattr(admission, "resolve_commit", lambda repo_url, ref: resolved.get(ref, "c0ffee"))
+    monkeypatch.setattr(admission, "ADMISSION_MAX_RUNNING", 20)
+    monkeypatch.setattr(admission, "ADMISSION_MAX_PER_REPO", 2)
+    return resolved
+
+def _job(job_id, branch="main", repo=REPO):
+    job = {"job_id": job_id, "repo_url": repo, "branch": branch, "status": "accepted", "stage": "dependency_analyst"}
+    job_io.write(f"jobs/{job_id}/job.json", job)
+    return job
+
+def _state():
+    return job_io.read(ADMISSION_STATE_KEY)
+
+def test_same_commit_coalesces_and_release_mirrors_outcome():
+    assert admission.admit("a", _job("a")) == ("run", [])
+    assert admission.admit("b", _job("b")) == ("follower", [])
+    assert job_io.load("b", "job")["leader_job_id"] == "a"
+    assert job_io.load("b", "job")["status"] == "accepted"
+
+    job_io.update("a", "job", {"status": "completed", "stage": "reviewer"})
+    assert admission.release("a") == []
+    follower = job_io.load("b", "job")
+    assert (follower["status"], follower["stage"]) == ("completed", "reviewer")
+    assert _state()["inflight"] == {}
+
+def test_unresolved_commit_is_never_coalesced(commits):
+    commits["main"] = ""
+    assert admission.admit("a", _job("a"))[0] == "run"
+    assert admission.admit("b", _job("b"))[0] == "run"
+    assert "leader_job_id" not in job_io.load("b", "job")
+
+def test_per_repo_cap_queues_and_release_starts_next(commits):
+    commits.update({"x": "1", "y": "2", "z": "3"})
+    assert admission.admit("a", _job("a", "x"))[0] == "run"
+    assert admission.admit("b", _job("b", "y"))[0] == "run"
+    assert admission.admit("c", _job("c", "z"))[0] == "queued"
+    assert job_io.load("c", "job")["queued"] is True
+
+    assert admission.release("a") == ["c"]
+    assert job_io.load("c", "job")["queued"] is False
+    assert admission.admit("c", job_io.load("c", "job")) == ("run", [])
+
+def test_release_without_entry_still_drains_queue():
+    job_io.write(ADMISSION_STATE_KEY, {"running": {}, "inflight": {}, "queue": [{"job_id": "q", "repo": REPO, "dedupe": None}]})
+    _job("q")
+    assert admission.release("gone") == ["q"]
+    assert "q" in _state()["running"]
+
+def test_stale_leader_hands_over_to_first_follower(commits):
+    commits["other"] = "2"
+    admission.admit("a", _job("a"))
+    admission.admit("b", _job("b"))
+    admission.admit("c", _job("c"))
+    state = _state()
+    state["running"]["a"]["since"] = 0
+    job_io.write(ADMISSION_STATE_KEY, state)
+
+    decision, started = admission.admit("d", _job("d", "other"))
+    assert decision == "run"
+    assert started == ["b"]
+    assert "a" not in _state()["running"]
+    assert job_io.load("b", "job")["leader_job_id"] is None
+    assert job_io.load("c", "job")["leader_job_id"] == "b"
+
+    job_io.update("b", "job", {"status": "completed"})
+    admission.release("b")
+    assert job_io.load("c", "job")["status"] == "completed"
+
+def test_concurrent_admits_do_not_lose_updates(monkeypatch, commits):
+    # Without the in-process lock only the conditional write keeps the state consistent.
+    monkeypatch.setattr(admission, "_lock", contextlib.nullcontext())
+    monkeypatch.setattr(admission, "ADMISSION_MAX_PER_REPO", 0)
+    ids = [f"j{i}" for i in range(16)]
+    for i, job_id in enumerate(ids):
+        commits[f"b{i}"] = str(i)
+        _job(job_id, f"b{i}")
+
+    threads = [threading.Thread(target=admission.admit, args=(job_id, job_io.load(job_id, "job"))) for job_id in ids]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(_state()["running"]) == sorted(ids)
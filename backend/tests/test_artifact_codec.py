@@ -0,0 +1,42 @@
+from backend.runner.utils import artifact_codec, job_io
+import pytest
+
+DATA = {"nodes": ["a", "b"], "edges": [["a", "b"]], "impact": {"a": 0, "b": 1}, "note": "ünïcode"}
+
+@pytest.mark.parametrize("codec", ["json", "json+gzip", "json+zstd", "msgpack"])
+def test_round_trip(codec):
+    codec = artifact_codec.available(codec)
+    body, content_type, content_encoding = artifact_codec.encode(DATA, codec)
+    assert artifact_codec.decode(body) == DATA
+    assert content_encoding == {"json+gzip": "gzip", "json+zstd": "zstd"}.get(codec)
+
+def test_pretty_json_round_trips():
+    body, _, _ = artifact_codec.encode(DATA, "json", pretty=True)
+    assert b"\n" in body
+    assert artifact_codec.decode(body) == DATA
+
+def test_gzip_output_is_deterministic():
+    assert artifact_codec.encode(DATA, "json+gzip")[0] == artifact_codec.encode(DATA, "json+gzip")[0]
+
+def test_codec_for_key_matches_artifact_names(monkeypatch):
+    monkeypatch.setattr(artifact_codec, "ARTIFACT_CODECS", {"dependency": "json+gzip", "graph/dependents/*": "json+gzip"})
+    monkeypatch.setattr(artifact_codec, "ARTIFACT_CODEC_DEFAULT", "json")
+    assert artifact_codec.codec_for_key("jobs/j1/dependency.json") == "json+gzip"
+    assert artifact_codec.codec_for_key("jobs/j1/graph/dependents/3.json") == "json+gzip"
+    assert artifact_codec.codec_for_key("jobs/j1/job.json") == "json"
+    assert artifact_codec.codec_for_key("jobs/j1/graph/manifest.json") == "json"
+
+def test_unknown_or_missing_codecs_degrade(monkeypatch):
+    assert artifact_codec.available("bogus") == "json"
+    monkeypatch.setattr(artifact_codec, "zstandard", None)
+    monkeypatch.setattr(artifact_codec, "msgpack", None)
+    assert artifact_codec.available("json+zstd") == "json+gzip"
+    assert artifact_codec.available("msgpack") == "json+gzip"
+
+def test_job_io_and_bff_read_what_the_runner_wrote():
+    from backend.bff import app as bff
+    for codec in ("json", "json+gzip", "msgpack"):
+        key = f"jobs/j1/{codec}.json"
+        job_io.write(key, DATA, codec=codec)
+        assert job_io.read(key) == DATA
+        assert bff._store_get(key) == DATA
@@ -0,0 +1,51 @@
+from backend.bff import app as bff
+from backend.runner.utils import dependency_graph, job_io
+from fastapi.testclient import TestClient
+import pytest
+
+# a <- b <- c <- d (each module imports the previous one), plus e importing a.
+EDGES = [["b", "a"], ["c", "b"], ["d", "c"], ["e", "a"]]
+
+@pytest.fixture
+def client():
+    nodes = sorted({n for e in EDGES for n in e})
+    graph = {n: set() for n in nodes}
+    for src, dst in EDGES:
+        graph[src].add(dst)
+    payload = {"nodes": nodes, "edges": EDGES, "impact": dependency_graph.transitive_impact(graph)}
+    dependency_graph.write_index("leader", payload)
+    job_io.write("jobs/leader/job.json", {"job_id": "leader", "status": "completed", "stage": "reviewer"})
+    job_io.write("jobs/follower/job.json", {"job_id": "follower", "status": "accepted", "stage": "dependency_analyst", "leader_job_id": "leader"})
+    return TestClient(bff.app)
+
+def test_direct_dependents(client):
+    r = client.get("/jobs/leader/graph/dependents", params={"module": "a"})
+    assert r.status_code == 200
+    assert r.json() == {"module": "a", "impact": 4, "dependents": ["b", "e"]}
+
+def test_transitive_dependents_in_bfs_order(client):
+    r = client.get("/jobs/leader/graph/dependents", params={"module": "a", "transitive": True})
+    body = r.json()
+    assert body["transitive"] == ["b", "e", "c", "d"]
+    assert body["truncated"] is False
+
+def test_limit_truncates_the_walk(client):
+    body = client.get("/jobs/leader/graph/dependents", params={"module": "a", "transitive": True, "limit": 2}).json()
+    assert body["transitive"] == ["b", "e"]
+    assert body["truncated"] is True
+
+def test_missing_module_and_index_are_404(client):
+    assert client.get("/jobs/leader/graph/dependents", params={"module": "zzz"}).status_code == 404
+    assert client.get("/jobs/nope/graph/dependents", params={"module": "a"}).status_code == 404
+    assert client.get("/jobs/nope/graph/impact").status_code == 404
+
+def test_impact_ranking(client):
+    body = client.get("/jobs/leader/graph/impact", params={"top": 2}).json()
+    assert (body["nodes"], body["edges"]) == (5, 4)
+    assert body["top_impact"] == [{"module": "a", "impact": 4}, {"module": "b", "impact": 2}]
+
+def test_follower_reads_the_leader(client):
+    assert client.get("/jobs/follower/graph/dependents", params={"module": "c"}).json()["dependents"] == ["d"]
+    assert client.get("/jobs/follower/graph/impact").json()["nodes"] == 5
+    job = client.get("/jobs/follower").json()
+    assert (job["job_id"], job["status"], job["stage"]) == ("follower", "completed", "reviewer")
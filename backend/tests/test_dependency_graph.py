@@ -0,0 +1,55 @@
+from backend.runner.utils import dependency_graph, job_io
+import random
+
+def _brute_force(graph):
+    # Module m's impact: every other module that reaches m along import edges.
+    nodes = set(graph) | {d for ds in graph.values() for d in ds}
+    out = {}
+    for target in nodes:
+        count = 0
+        for src in nodes - {target}:
+            seen, stack = {src}, [src]
+            while stack:
+                n = stack.pop()
+                if n == target:
+                    count += 1
+                    break
+                for d in graph.get(n, ()):
+                    if d not in seen:
+                        seen.add(d)
+                        stack.append(d)
+        out[target] = count
+    return out
+
+def _random_graph(rng, n):
+    nodes = [f"m{i}" for i in range(n)]
+    return {a: {b for b in nodes if b != a and rng.random() < 2.0 / n} for a in nodes}
+
+def test_transitive_impact_matches_brute_force():
+    rng = random.Random(7)
+    for _ in range(100):
+        graph = _random_graph(rng, rng.randint(1, 30))
+        assert dependency_graph.transitive_impact(graph) == _brute_force(graph)
+
+def test_cycle_members_depend_on_each_other():
+    graph = {"a": {"b"}, "b": {"c"}, "c": {"a"}, "d": {"a"}}
+    assert dependency_graph.transitive_impact(graph) == {"a": 3, "b": 3, "c": 3, "d": 0}
+
+def test_deep_chain_does_not_recurse():
+    graph = {f"m{i}": {f"m{i + 1}"} for i in range(5000)}
+    impact = dependency_graph.transitive_impact(graph)
+    assert impact["m5000"] == 5000
+    assert impact["m0"] == 0
+
+def test_write_index_shards_reverse_edges():
+    nodes = [f"m{i}" for i in range(40)]
+    edges = [[f"m{i}", f"m{i + 1}"] for i in range(39)]
+    graph = {n: set() for n in nodes}
+    for a, b in edges:
+        graph[a].add(b)
+    manifest = dependency_graph.write_index("j1", {"nodes": nodes, "edges": edges, "impact": dependency_graph.transitive_impact(graph)}, top=3)
+    assert manifest["top_impact"][0] == {"module": "m39", "impact": 39}
+
+    shard = dependency_graph.shard_of("m5", manifest["shards"])
+    entry = job_io.read(f"jobs/j1/graph/dependents/{shard}.json")["m5"]
+    assert entry == {"dependents": ["m4"], "impact": 5}
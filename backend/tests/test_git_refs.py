@@ -0,0 +1,49 @@
+from backend.runner.utils import admission, dependency_analyst, git_refs
+import subprocess
+import pytest
+
+GIT = ["git", "-c", "user.name=t", "-c", "user.email=t@localhost"]
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / "repo"
+    root.mkdir()
+    run = lambda *args: subprocess.run([*GIT, *args], cwd=root, check=True, capture_output=True, text=True).stdout.strip()
+    run("init", "-q", "-b", "main")
+    (root / "a.py").write_text("import os\n", encoding="utf-8")
+    run("add", "-A")
+    run("commit", "-q", "-m", "one")
+    first = run("rev-parse", "HEAD")
+    run("tag", "light")
+    run("tag", "-a", "v1", "-m", "release")
+    run("checkout", "-q", "-b", "feature")
+    (root / "b.py").write_text("import sys\n", encoding="utf-8")
+    run("add", "-A")
+    run("commit", "-q", "-m", "two")
+    second = run("rev-parse", "HEAD")
+    return root.as_uri(), first, second
+
+def test_resolve_follows_git_precedence(repo):
+    url, first, second = repo
+    remote = git_refs.list_remote(url, ["main", "feature", "v1", "light"])
+    assert git_refs.resolve("main", remote) == ("refs/heads/main", first)
+    assert git_refs.resolve("refs/heads/feature", remote) == ("refs/heads/feature", second)
+    assert git_refs.resolve("v1", remote) == ("refs/tags/v1", first)
+    assert git_refs.resolve("light", remote) == ("refs/tags/light", first)
+    assert git_refs.resolve(second.upper(), {}) == (second, second)
+    with pytest.raises(ValueError):
+        git_refs.resolve("missing", remote)
+
+def test_admission_resolves_tags_and_commit_ids(repo):
+    url, first, second = repo
+    assert admission.resolve_commit(url, "v1") == first
+    assert admission.resolve_commit(url, "feature") == second
+    assert admission.resolve_commit(url, second) == second
+    assert admission.resolve_commit(url, "missing") == ""
+
+def test_analyse_refs_accepts_tags_and_commit_ids(repo):
+    url, first, second = repo
+    result = dependency_analyst.analyse_refs(url, ["v1", second])
+    assert result["refs"]["v1"]["commit"] == first
+    assert result["refs"][second]["commit"] == second
+    assert result["delta"][second]["added_nodes"] == ["b"]
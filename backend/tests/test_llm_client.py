@@ -0,0 +1,70 @@
+from backend.runner.utils import llm_client
+from concurrent.futures import ThreadPoolExecutor
+import pytest, requests
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    calls = []
+    monkeypatch.setattr(llm_client.time, "sleep", calls.append)
+    return calls
+
+def _client(stub, **kwargs):
+    kwargs.setdefault("api_key", "")
+    return llm_client.LLMClient(endpoint=stub.url, timeout=5, **kwargs)
+
+def _script(*replies):
+    replies = list(replies)
+    return lambda payload: replies.pop(0) if len(replies) > 1 else replies[0]
+
+def test_retries_transient_statuses_with_capped_backoff(llm_stub, sleeps):
+    llm_stub.reply = _script((503, "", {}), (429, "", {}), (200, "done", {}))
+    client = _client(llm_stub, max_retries=3, backoff_base=1.0, backoff_cap=1.5)
+    assert client.complete(MESSAGES) == "done"
+    assert len(llm_stub.requests) == 3
+    assert 0.5 <= sleeps[0] <= 1.0
+    assert 0.75 <= sleeps[1] <= 1.5
+
+def test_retry_after_header_wins_over_backoff(llm_stub, sleeps):
+    llm_stub.reply = _script((429, "", {"Retry-After": "2"}), (200, "done", {}))
+    assert _client(llm_stub, max_retries=1).complete(MESSAGES) == "done"
+    assert sleeps == [2.0]
+
+def test_gives_up_after_max_retries(llm_stub, sleeps):
+    llm_stub.reply = lambda payload: (502, "", {})
+    with pytest.raises(llm_client.LLMError, match="3 attempts"):
+        _client(llm_stub, max_retries=2).complete(MESSAGES)
+    assert len(llm_stub.requests) == 3
+    assert len(sleeps) == 2
+
+def test_client_errors_are_not_retried(llm_stub, sleeps):
+    llm_stub.reply = lambda payload: (400, "", {})
+    with pytest.raises(requests.HTTPError):
+        _client(llm_stub, max_retries=3).complete(MESSAGES)
+    assert len(llm_stub.requests) == 1
+
+def test_connection_errors_are_retried(sleeps):
+    client = llm_client.LLMClient(endpoint="http://127.0.0.1:9/v1/chat/completions", api_key="", timeout=1, max_retries=1)
+    with pytest.raises(llm_client.LLMError):
+        client.complete(MESSAGES)
+    assert len(sleeps) == 1
+
+def test_cache_is_shared_through_the_job_store(llm_stub):
+    llm_stub.reply = lambda payload: (200, "cached answer", {})
+    assert _client(llm_stub).complete(MESSAGES, cache_key="k1") == "cached answer"
+    assert _client(llm_stub).complete(MESSAGES, cache_key="k1") == "cached answer"
+    assert len(llm_stub.requests) == 1
+    assert _client(llm_stub).lookup("k2") is None
+
+def test_concurrency_is_capped(llm_stub):
+    llm_stub.delay = 0.1
+    client = _client(llm_stub, max_concurrency=2)
+    with ThreadPoolExecutor(6) as pool:
+        assert list(pool.map(lambda _: client.complete(MESSAGES), range(6))) == ["ok"] * 6
+    assert llm_stub.max_inflight == 2
+
+def test_enabled_needs_a_key_or_a_custom_endpoint(llm_stub):
+    assert not llm_client.LLMClient(api_key="").enabled
+    assert llm_client.LLMClient(api_key="sk-test").enabled
+    assert _client(llm_stub).enabled
@@ -0,0 +1,71 @@
+from backend.runner import handler as runner
+from backend.runner.utils import admission, job_io, metrics
+import os, pstats, time
+import pytest
+
+def test_phases_aggregate_calls_and_time():
+    with metrics.record_stage("j1", "planner") as rec:
+        for _ in range(3):
+            with metrics.phase("outer"):
+                with metrics.phase("inner"):
+                    time.sleep(0.01)
+    outer, inner = rec.phases["outer"], rec.phases["inner"]
+    assert (outer["calls"], inner["calls"]) == (3, 3)
+    assert inner["wall_s"] >= 0.03
+    assert outer["wall_s"] >= inner["wall_s"]
+    assert rec.totals["wall_s"] >= outer["wall_s"]
+
+def test_phase_and_count_are_noops_outside_a_stage():
+    with metrics.phase("loose"):
+        metrics.count("anything")
+
+def test_job_io_counts_requests_and_bytes():
+    with metrics.record_stage("j1", "planner") as rec:
+        job_io.write("jobs/j1/plan.json", {"candidate": "a"})
+        job_io.read("jobs/j1/plan.json")
+        job_io.read("jobs/j1/missing.json")
+    c = rec.counters
+    assert (c["s3_put_requests"], c["s3_get_requests"]) == (1, 2)
+    assert c["s3_bytes_in"] == c["s3_bytes_out"] > 0
+
+def test_stages_merge_into_one_metrics_file():
+    with metrics.record_stage("j1", "planner"):
+        pass
+    with metrics.record_stage("j1", "reviewer"):
+        pass
+    stored = job_io.load("j1", "metrics")
+    assert set(stored) == {"planner", "reviewer"}
+    assert stored["planner"]["scope"] == "process"  # local mode runs jobs as threads
+    assert {"wall_s", "cpu_s", "child_cpu_s", "peak_rss_mb", "phases", "counters"} <= set(stored["reviewer"])
+
+def test_profile_is_dumped_in_pstats_format(local_store):
+    with metrics.record_stage("j1", "planner", profile=True):
+        sum(range(10000))
+    stats = pstats.Stats(str(local_store / "_local_s3" / "jobs" / "j1" / "profile.planner.prof"))
+    assert stats.total_calls > 0
+
+@pytest.mark.skipif(not os.access(metrics.PROC_CLEAR_REFS, os.W_OK), reason="needs /proc/self/clear_refs")
+def test_nested_scopes_keep_their_own_peak():
+    with metrics.record_stage("j1", "planner") as rec:
+        rec.per_scope = True
+        with metrics.phase("big"):
+            block = bytearray(64 * 1024 * 1024)
+            block[::4096] = b"\1" * len(block[::4096])
+            del block
+        with metrics.phase("small"):
+            pass
+    assert rec.totals["scope"] == "stage"
+    assert rec.phases["big"]["peak_rss_mb"] - rec.phases["small"]["peak_rss_mb"] > 40
+    assert rec.totals["peak_rss_mb"] >= rec.phases["big"]["peak_rss_mb"]
+
+def test_handler_records_admission_dispatch_and_handoff(monkeypatch):
+    monkeypatch.setattr(admission, "resolve_commit", lambda repo_url, ref: "c0ffee")
+    monkeypatch.setattr(runner, "_self_reinvoke", lambda job_id: None)
+    monkeypatch.setattr(runner.dependency_analyst, "run", lambda job_id, repo_url, branch: job_io.update(job_id, "job", {"stage": "planner"}))
+    job_io.write("jobs/j1/job.json", {"job_id": "j1", "repo_url": "https://example.com/r", "branch": "main", "status": "accepted", "stage": "dependency_analyst"})
+
+    assert runner.handler({"job_id": "j1"}, None) == {"ok": True}
+    recorded = job_io.load("j1", "metrics")["dependency_analyst"]
+    assert {"admission", "dispatch", "handoff"} <= set(recorded["phases"])
+    # The admission state read/write is counted alongside the stage's own I/O.
+    assert recorded["counters"]["s3_get_requests"] >= 3
@@ -0,0 +1,77 @@
+from backend.bench.synthetic_repo import RepoSpec, generate
+from backend.runner.agents import multi_ref_analyst
+from backend.runner.utils import dependency_analyst, job_io, metrics
+import shutil, subprocess
+import pytest
+
+GIT = ["git", "-c", "user.name=t", "-c", "user.email=t@localhost"]
+HAS_RUFF = shutil.which("ruff") is not None
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / "repo"
+    url = generate(root, RepoSpec(modules=8, fan_out=2, seed=3))
+    run = lambda *args: subprocess.run([*GIT, *args], cwd=root, check=True, capture_output=True)
+
+    # feature: one module edited, one added, one removed; ruff settings unchanged.
+    run("checkout", "-q", "-b", "feature")
+    (root / "pkg0" / "m1.py").write_text("import json\n\ndef f_1(x):\n    return x\n", encoding="utf-8")
+    (root / "pkg0" / "extra.py").write_text("from pkg0.m1 import f_1\n", encoding="utf-8")
+    run("rm", "-q", "pkg0/m7.py")
+    run("add", "-A")
+    run("commit", "-q", "-m", "feature")
+
+    # lint: same sources as main, but a ruff config that silences F401 under pkg0/.
+    run("checkout", "-q", "main")
+    run("checkout", "-q", "-b", "lint")
+    (root / "pyproject.toml").write_text('[tool.ruff.lint.per-file-ignores]\n"pkg0/*" = ["F401"]\n', encoding="utf-8")
+    run("add", "-A")
+    run("commit", "-q", "-m", "lint")
+    return url
+
+def test_changed_files_delta_and_shared_blobs(repo):
+    with metrics.record_stage("j1", "multi_ref_analyst") as rec:
+        result = dependency_analyst.analyse_refs(repo, ["main", "feature", "lint"])
+
+    feature = result["refs"]["feature"]
+    assert result["refs"]["main"]["changed_files"] is None
+    assert feature["changed_files"] == {"added": ["pkg0/extra.py"], "removed": ["pkg0/m7.py"], "modified": ["pkg0/m1.py"]}
+    assert result["refs"]["lint"]["changed_files"] == {"added": [], "removed": [], "modified": []}
+
+    delta = result["delta"]["feature"]
+    assert delta["added_nodes"] == ["pkg0.extra"]
+    assert delta["removed_nodes"] == ["pkg0.m7"]
+    assert ("pkg0.extra", "pkg0.m1") in delta["added_edges"]
+    assert "pkg0.m1" in delta["unused_added"]
+
+    # 9 files on main (8 modules + __init__.py); feature adds two new blobs; lint shares every source blob.
+    assert result["stats"]["blobs_parsed"] == 11
+    assert result["stats"]["files_total"] == 9 + 9 + 9
+    assert rec.counters["blobs_parsed"] == 11
+    assert rec.counters["blobs_reused"] == 7 + 9
+
+@pytest.mark.skipif(not HAS_RUFF, reason="ruff is not installed")
+def test_ruff_reruns_when_config_changes(repo):
+    with metrics.record_stage("j1", "multi_ref_analyst") as rec:
+        result = dependency_analyst.analyse_refs(repo, ["main", "feature", "lint"])
+
+    # main: all 9 files; feature: only the two new blobs; lint: all 9 again under the new config.
+    assert rec.counters["ruff_files_checked"] == 9 + 2 + 9
+    main_ruff = {m for m, items in result["refs"]["main"]["unused_imports"].items() if any(i.startswith("ruff::") for i in items)}
+    lint_ruff = {m for m, items in result["refs"]["lint"]["unused_imports"].items() if any(i.startswith("ruff::") for i in items)}
+    assert main_ruff
+    assert lint_ruff == set()
+
+def test_multi_ref_analyst_writes_artifact(repo):
+    job_io.write("jobs/j1/job.json", {"job_id": "j1", "repo_url": repo, "refs": ["main", "feature"], "status": "running", "stage": "multi_ref_analyst"})
+    multi_ref_analyst.run("j1", repo, "main")
+    assert job_io.load("j1", "job")["status"] == "completed"
+    artifact = job_io.load("j1", "multi_dependency")
+    assert artifact["base"] == "main"
+    assert set(artifact["refs"]) == {"main", "feature"}
+
+def test_multi_ref_analyst_fails_job_on_unknown_ref(repo):
+    job_io.write("jobs/j1/job.json", {"job_id": "j1", "repo_url": repo, "refs": ["main", "nope"], "status": "running", "stage": "multi_ref_analyst"})
+    multi_ref_analyst.run("j1", repo, "main")
+    assert job_io.load("j1", "job")["status"] == "failed"
+    assert job_io.load("j1", "multi_dependency") is None
@@ -0,0 +1,36 @@
+from backend.runner.utils import dependency_analyst, implementer, job_io, planner
+import shutil, subprocess
+import pytest
+
+def _deps(unused):
+    return {"nodes": sorted(unused), "edges": [], "topo_order": sorted(unused), "impact": {}, "unused_imports": unused}
+
+def test_ruff_only_findings_are_not_planned():
+    job_io.update("j1", "dependency", _deps({"a": ["ruff::os"], "b": ["ruff::sys", "sys::sys"]}))
+    plan = planner.plan_single_file("j1")
+    assert plan["candidate"] == "b"
+    assert plan["unused_imports"] == ["sys::sys"]
+
+def test_nothing_to_plan_when_only_ruff_reports():
+    job_io.update("j1", "dependency", _deps({"a": ["ruff::os"]}))
+    with pytest.raises(ValueError, match="No modules have unused imports"):
+        planner.plan_single_file("j1")
+
+def test_implementer_ignores_ruff_entries():
+    assert implementer._parse_unused_targets(["ruff::os", "x::y", "sys::sys"]) == ({"x": {"y"}}, {"sys"})
+
+@pytest.mark.skipif(shutil.which("ruff") is None, reason="ruff is not installed")
+def test_shadowed_import_reported_by_ruff_is_not_planned(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "a.py").write_text("import os\ndef f(os): return os\n", encoding="utf-8")
+    git = ["git", "-c", "user.name=t", "-c", "user.email=t@localhost"]
+    subprocess.run(["git", "init", "-q", "-b", "main"], cwd=repo, check=True)
+    subprocess.run(["git", "add", "-A"], cwd=repo, check=True)
+    subprocess.run([*git, "commit", "-q", "-m", "one"], cwd=repo, check=True)
+
+    deps = dependency_analyst.analyse_repo(repo.as_uri(), "main")
+    assert deps["unused_imports"] == {"a": ["ruff::os"]}
+    job_io.update("j1", "dependency", deps)
+    with pytest.raises(ValueError, match="No modules have unused imports"):
+        planner.plan_single_file("j1")
@@ -0,0 +1,84 @@
+from backend.runner.utils import llm_client, summary_queue
+from concurrent.futures import ThreadPoolExecutor
+import json, re, time
+import pytest
+
+@pytest.fixture
+def client(llm_stub):
+    c = llm_client.LLMClient(endpoint=llm_stub.url, api_key="", max_retries=0, timeout=5)
+    yield c
+    c.close()
+
+def _answer(payload):
+    prompt = payload["messages"][-1]["content"]
+    sections = re.findall(r"^### \d+\n(.*)$", prompt, flags=re.M)
+    if sections:
+        return 200, json.dumps([f"summary of {s}" for s in sections]), {}
+    return 200, "summary of " + prompt.rsplit("\n", 1)[-1], {}
+
+def test_window_batches_findings_from_concurrent_jobs(llm_stub, client):
+    llm_stub.reply = _answer
+    queue = summary_queue.SummaryQueue(client, window=0.3, max_items=10)
+    samples = ["a.py:1 F401", "b.py:2 E501", "c.py:3 F841"]
+    with ThreadPoolExecutor(len(samples)) as pool:
+        results = list(pool.map(queue.summarise, samples))
+    assert results == [f"summary of {s}" for s in samples]
+    assert len(llm_stub.requests) == 1
+
+def test_identical_findings_share_a_slot_and_hit_the_cache(llm_stub, client):
+    llm_stub.reply = _answer
+    queue = summary_queue.SummaryQueue(client, window=0.2, max_items=10)
+    futures = [queue.submit("a.py:1 F401") for _ in range(3)]
+    assert {f.result(5) for f in futures} == {"summary of a.py:1 F401"}
+    assert len(llm_stub.requests) == 1
+    assert queue.summarise("a.py:1 F401") == "summary of a.py:1 F401"
+    assert len(llm_stub.requests) == 1
+
+def test_unparseable_batch_falls_back_to_single_requests(llm_stub, client):
+    llm_stub.reply = lambda payload: (200, "not json" if "###" in payload["messages"][-1]["content"] else "single", {})
+    queue = summary_queue.SummaryQueue(client, window=0.2, max_items=10)
+    futures = [queue.submit(s) for s in ("x", "y")]
+    assert [f.result(5) for f in futures] == ["single", "single"]
+    assert len(llm_stub.requests) == 3
+
+def test_zero_window_completes_in_the_caller(llm_stub, client):
+    llm_stub.reply = _answer
+    queue = summary_queue.SummaryQueue(client, window=0, max_items=10)
+    future = queue.submit("a.py:1 F401")
+    assert future.done()
+    assert future.result() == "summary of a.py:1 F401"
+    assert queue._worker is None
+
+def test_errors_reach_every_waiter(llm_stub, client):
+    llm_stub.reply = lambda payload: (500, "", {})
+    queue = summary_queue.SummaryQueue(client, window=0)
+    with pytest.raises(llm_client.LLMError):
+        queue.summarise("a.py:1 F401")
+
+def test_failed_batch_is_not_retried_per_item(llm_stub, monkeypatch):
+    monkeypatch.setattr(llm_client.time, "sleep", lambda s: None)
+    llm_stub.reply = lambda payload: (429, "", {})
+    client = llm_client.LLMClient(endpoint=llm_stub.url, api_key="", max_retries=2, timeout=5)
+    queue = summary_queue.SummaryQueue(client, window=0.2, max_items=10)
+    futures = [queue.submit(s) for s in ("x", "y", "z")]
+    for f in futures:
+        with pytest.raises(llm_client.LLMError):
+            f.result(5)
+    assert len(llm_stub.requests) == 3  # one batch request and its two retries
+
+def test_fallback_runs_items_concurrently(llm_stub):
+    llm_stub.delay = 0.2
+    llm_stub.reply = lambda payload: (200, "not json" if "###" in payload["messages"][-1]["content"] else "single", {})
+    client = llm_client.LLMClient(endpoint=llm_stub.url, api_key="", max_retries=0, timeout=5, max_concurrency=4)
+    queue = summary_queue.SummaryQueue(client, window=0.1, max_items=4)
+    start = time.monotonic()
+    futures = [queue.submit(s) for s in ("a", "b", "c", "d")]
+    assert [f.result(5) for f in futures] == ["single"] * 4
+    assert time.monotonic() - start < 0.1 + 0.2 + 0.2 * 3
+    assert llm_stub.max_inflight == 4
+
+def test_default_timeout_covers_batch_and_fallback_rounds(client):
+    queue = summary_queue.SummaryQueue(client, window=0.5, max_items=20)
+    budget = client.request_budget()
+    assert budget >= client.timeout + llm_client.RETRY_AFTER_CAP * client.max_retries
+    assert queue.timeout_budget() == pytest.approx(0.5 + budget * (1 + 20 / client.max_concurrency))
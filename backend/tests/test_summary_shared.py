@@ -0,0 +1,94 @@
+from backend.config import SUMMARY_SHARED_KEY
+from backend.runner.agents import reviewer as reviewer_agent
+from backend.runner.utils import job_io, llm_client, reviewer, summary_queue
+import json, re, threading, time
+import pytest
+
+@pytest.fixture
+def client(llm_stub, monkeypatch):
+    monkeypatch.setattr(summary_queue, "SUMMARY_SHARED_WINDOW", 0.3)
+    c = llm_client.LLMClient(endpoint=llm_stub.url, api_key="", max_retries=0, timeout=5)
+    llm_stub.reply = _answer
+    yield c
+    c.close()
+
+def _answer(payload):
+    prompt = payload["messages"][-1]["content"]
+    sections = re.findall(r"^### \d+\n(.*)$", prompt, flags=re.M)
+    if sections:
+        return 200, json.dumps([f"summary of {s}" for s in sections]), {}
+    return 200, "summary of " + prompt.rsplit("\n", 1)[-1], {}
+
+def _review(job_id):
+    return job_io.load(job_id, "review") or {}
+
+def _defer_all(client, jobs):
+    # Each thread stands in for a separate runner invocation sharing the job store.
+    threads = [threading.Thread(target=summary_queue.defer, args=(j, f"{j}.py:1 F401", client)) for j in jobs]
+    for t in threads:
+        t.start()
+        time.sleep(0.02)
+    for t in threads:
+        t.join(10)
+
+def test_invocations_within_a_window_share_one_request(llm_stub, client):
+    _defer_all(client, ["j1", "j2", "j3"])
+    assert len(llm_stub.requests) == 1
+    for j in ("j1", "j2", "j3"):
+        assert _review(j) == {"summary": f"summary of {j}.py:1 F401", "summary_status": "done"}
+    assert job_io.read(SUMMARY_SHARED_KEY) == {"items": []}
+
+def test_a_full_batch_is_sent_without_waiting(llm_stub, client, monkeypatch):
+    monkeypatch.setattr(summary_queue, "SUMMARY_SHARED_WINDOW", 2.0)
+    monkeypatch.setattr(summary_queue, "SUMMARY_BATCH_MAX", 2)
+    owner = threading.Thread(target=summary_queue.defer, args=("j1", "j1.py:1 F401", client))
+    owner.start()
+    time.sleep(0.1)
+    start = time.monotonic()
+    summary_queue.defer("j2", "j2.py:1 F401", client)
+    assert time.monotonic() - start < 1.0
+    assert _review("j1")["summary_status"] == _review("j2")["summary_status"] == "done"
+    owner.join(5)
+    assert len(llm_stub.requests) == 1
+
+def test_window_left_by_a_dead_invocation_is_sent_by_the_next(llm_stub, client):
+    stale = {"batch_id": "gone", "opened_at": 0, "items": [{"job_id": "j0", "sample": "j0.py:1 F401", "cache_key": "k0"}]}
+    job_io.write(SUMMARY_SHARED_KEY, stale)
+    start = time.monotonic()
+    summary_queue.defer("j1", "j1.py:1 F401", client)
+    assert time.monotonic() - start < 0.3
+    assert _review("j0")["summary"] == "summary of j0.py:1 F401"
+    assert _review("j1")["summary"] == "summary of j1.py:1 F401"
+
+def test_cached_summary_is_written_without_queueing(llm_stub, client):
+    summary_queue.defer("j1", "same", client)
+    requests = len(llm_stub.requests)
+    summary_queue.defer("j2", "same", client)
+    assert len(llm_stub.requests) == requests
+    assert _review("j2")["summary"] == _review("j1")["summary"]
+
+def test_failed_batch_marks_every_review(llm_stub, client):
+    llm_stub.reply = lambda payload: (503, "", {})
+    _defer_all(client, ["j1", "j2"])
+    assert len(llm_stub.requests) == 1
+    for j in ("j1", "j2"):
+        assert _review(j) == {"summary": summary_queue.SUMMARY_FAILED, "summary_status": "failed"}
+
+def test_reviewer_writes_review_before_deferring(llm_stub, client, monkeypatch):
+    monkeypatch.setattr(llm_client, "_client", client)
+    monkeypatch.setattr(reviewer, "SUMMARY_SHARED", True)
+    def fake_clone(url, branch, dest):
+        dest.mkdir(parents=True)
+        (dest / "pkg.py").write_text("import os\n", encoding="utf-8")
+    monkeypatch.setattr(reviewer, "_shallow_clone", fake_clone)
+    monkeypatch.setattr(reviewer, "_run_ruff", lambda repo_dir, files: [{"file": "pkg/a.py", "line": 1, "code": "F401", "message": "unused"}])
+    job_io.update("j1", "implement.diff", {"candidate": "pkg", "patch": ""})
+    job_io.write("jobs/j1/job.json", {"job_id": "j1", "status": "running", "stage": "reviewer"})
+
+    reviewer_agent.run("j1", "https://example.com/r", "main")
+    review = _review("j1")
+    assert review["summary"] == "summary of pkg/a.py:1 F401 unused"
+    assert review["summary_status"] == "done"
+    assert "summary_sample" not in review
+    assert review["lint_issues"]["count"] == 1
+    assert job_io.load("j1", "job")["status"] == "completed"